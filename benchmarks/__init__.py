@@ -0,0 +1 @@
+"""Simulator and benchmarks of the ecoNET300 integration hot paths."""
@@ -0,0 +1,131 @@
+"""Benchmarks of the api client against the simulator and of the coordinator update fan-out.
+
+    python -m benchmarks.bench_api [--requests 500] [--concurrency 8] [--latency 0.0] [--no-record]
+
+Results are appended to benchmarks/results.jsonl.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from aiohttp import ClientSession
+
+from custom_components.econet300.api import EconetClient, Econet300Api
+from custom_components.econet300.change_tracker import ChangeTracker
+from custom_components.econet300.const import API_REG_PARAMS_URI
+from custom_components.econet300.dispatcher import KeyDispatcher
+from custom_components.econet300.mem_cache import MemCache
+from custom_components.econet300.retry import RetryPolicy
+
+from .common import percentiles, record, time_call, RESULTS_FILE
+from .simulator import EconetSimulator, SimulatorConfig
+
+
+def _client(url: str, session: ClientSession) -> EconetClient:
+    return EconetClient(url, "admin", "admin", session, RetryPolicy(base_delay=0.01, max_delay=0.05))
+
+
+async def bench_client_throughput(simulator: EconetSimulator, requests: int, concurrency: int) -> dict:
+    """Concurrent regParams reads through EconetClient, concurrent readers are coalesced by the client"""
+    remaining = requests
+    http_before = simulator.stats.requests.get(API_REG_PARAMS_URI, 0)
+
+    async with ClientSession() as session:
+        client = _client(simulator.url, session)
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                await client.get_params(API_REG_PARAMS_URI)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "calls_per_s": requests / elapsed,
+        "http_requests": simulator.stats.requests.get(API_REG_PARAMS_URI, 0) - http_before,
+    }
+
+
+async def bench_refresh_latency(simulator: EconetSimulator, requests: int) -> dict:
+    """Sequential Econet300Api.fetch_data calls, as done by the coordinator"""
+    samples = []
+
+    async with ClientSession() as session:
+        api = await Econet300Api.create(_client(simulator.url, session), MemCache())
+
+        for _ in range(requests):
+            started = time.perf_counter()
+            await api.fetch_data()
+            samples.append(time.perf_counter() - started)
+
+        await api.async_close()
+
+    return percentiles(samples)
+
+
+def bench_fan_out(keys: int, change_rate: float, refreshes: int) -> dict:
+    """Snapshot diff and dispatch to one subscriber per key, without HA state writes"""
+    rnd = random.Random(0)
+    snapshot = {"reg{}".format(i): 20.0 + i % 50 for i in range(keys)}
+    tracker = ChangeTracker()
+    dispatcher = KeyDispatcher()
+
+    for key in snapshot:
+        tracker.set_tolerance(key, 0.1)
+        dispatcher.subscribe(key, lambda: None)
+
+    snapshots = []
+    for _ in range(refreshes):
+        snapshot = {k: (round(v + rnd.uniform(-1, 1), 2) if rnd.random() < change_rate else v)
+                    for k, v in snapshot.items()}
+        snapshots.append(snapshot)
+
+    dispatched = 0
+    it = iter(snapshots)
+
+    def refresh():
+        nonlocal dispatched
+        dispatched += dispatcher.dispatch(tracker.diff(next(it)))
+
+    result = percentiles(time_call(refresh, refreshes))
+    result["dispatched_per_refresh"] = dispatched / refreshes
+    return result
+
+
+async def run(args) -> dict:
+    simulator = EconetSimulator(SimulatorConfig(latency=args.latency, extra_keys=args.extra_keys, seed=0))
+    await simulator.start()
+
+    try:
+        results = {
+            "client_throughput": await bench_client_throughput(simulator, args.requests, args.concurrency),
+            "refresh_latency_ms": await bench_refresh_latency(simulator, min(args.requests, 200)),
+        }
+    finally:
+        await simulator.stop()
+
+    for keys in (25, 250, 1000):
+        results["fan_out_ms[{} keys]".format(keys)] = bench_fan_out(keys, 0.3, 200)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--extra-keys", type=int, default=200)
+    parser.add_argument("--no-record", action="store_true", help="do not append the results to the log")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    record("api", results, None if args.no_record else RESULTS_FILE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmarks of the regParams JSON decoding paths.
+
+    python -m benchmarks.bench_decode [--extra-keys 200] [--repeat 500] [--no-record]
+
+Compares the former resp.json() path (bytes -> str -> json.loads) with the json_decoder module, on both backends
+and with and without section selection.
+"""
+import argparse
+import json
+
+from custom_components.econet300 import json_decoder
+from custom_components.econet300.const import API_REG_PARAMS_PARAM_DATA
+
+from .common import percentiles, record, time_call, RESULTS_FILE
+from .simulator import EconetSimulator, SimulatorConfig
+
+
+def reg_params_payload(extra_keys: int) -> bytes:
+    """A regParams document of the simulator, with the curr dict plus the unit/name side tables"""
+    simulator = EconetSimulator(SimulatorConfig(extra_keys=extra_keys, seed=0))
+    doc = simulator._reg_params_doc(None)
+    doc["currNames"] = {key: "Register {}".format(key) for key in doc["curr"]}
+    doc["tilesParams"] = [[[i, 1, 0], [i, 0, 1]] for i in range(len(doc["curr"]))]
+
+    return json.dumps(doc).encode("utf-8")
+
+
+def bench(payload: bytes, repeat: int) -> dict:
+    sections = (API_REG_PARAMS_PARAM_DATA,)
+    cases = {
+        "resp.json() equivalent": lambda: json.loads(payload.decode("utf-8")),
+    }
+
+    orjson = json_decoder.orjson
+    backends = [("json", None)] + ([("orjson", orjson)] if orjson is not None else [])
+
+    for name, module in backends:
+        cases["{} full".format(name)] = lambda module=module: _decode(module, payload, None)
+        cases["{} curr only".format(name)] = lambda module=module: _decode(module, payload, sections)
+
+    results = {"payload_bytes": len(payload)}
+    for name, case in cases.items():
+        results["{} ms".format(name)] = percentiles(time_call(case, repeat))
+
+    return results
+
+
+def _decode(module, payload, sections):
+    json_decoder.orjson = module
+
+    try:
+        return json_decoder.decode(payload, sections)
+    finally:
+        json_decoder.orjson = _ORJSON
+
+
+_ORJSON = json_decoder.orjson
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--extra-keys", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--no-record", action="store_true", help="do not append the results to the log")
+    args = parser.parse_args()
+
+    results = bench(reg_params_payload(args.extra_keys), args.repeat)
+    record("decode", results, None if args.no_record else RESULTS_FILE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmarks of the integration import time, the part of the HA startup spent in this integration.
+
+    python -m benchmarks.bench_import [--repeat 20] [--no-record]
+
+Every module is imported in a fresh interpreter with -X importtime, so nothing is cached in sys.modules. The
+cumulative time of the module is reported, the self time of the integration modules (excluding Home Assistant,
+aiohttp and the stdlib) shows what the integration itself adds.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from .common import percentiles, record, RESULTS_FILE
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "custom_components.econet300"
+MODULES = (
+    PACKAGE,
+    PACKAGE + ".sensor",
+    PACKAGE + ".binary_sensor",
+    PACKAGE + ".number",
+    PACKAGE + ".config_flow",
+    PACKAGE + ".diagnostics",
+)
+
+
+def import_times(module: str) -> tuple[float, float]:
+    """Import module in a fresh interpreter, returns its cumulative time and the self time of the integration"""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import {}".format(module)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stderr
+
+    cumulative = 0.0
+    own = 0.0
+
+    # import time: self [us] | cumulative | imported package
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+
+        if name == module:
+            cumulative = int(cumulative_us) / 1e6
+        if name.startswith(PACKAGE):
+            own += int(self_us) / 1e6
+
+    return cumulative, own
+
+
+def bench(repeat: int) -> dict:
+    results = {}
+
+    for module in MODULES:
+        samples = [import_times(module) for _ in range(repeat)]
+        results["{} ms".format(module)] = percentiles([cumulative for cumulative, _ in samples])
+        results["{} own ms".format(module)] = percentiles([own for _, own in samples])
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--no-record", action="store_true", help="do not append the results to the log")
+    args = parser.parse_args()
+
+    record("import", bench(args.repeat), None if args.no_record else RESULTS_FILE)
+
+
+if __name__ == "__main__":
+    main()
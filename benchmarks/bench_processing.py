@@ -0,0 +1,74 @@
+"""Benchmarks of the value processing of a refresh: per entity calls against the processing in the coordinator.
+
+    python -m benchmarks.bench_processing [--keys 10 100 1000] [--changed 0.2] [--repeat 500] [--no-record]
+
+Only the keys the change tracker reports as changed are processed, a --changed fraction of them per refresh. The per
+entity path calls the processor of every changed key, one Python call at a time, like the sensors did in their state
+sync. The coordinator path runs BatchProcessor.process over the changed keys. Keys are spread over the processors of
+the sensor descriptions.
+"""
+import argparse
+import random
+
+from custom_components.econet300.processors import BatchProcessor, ROUND_1, ROUND_2, PERCENT_1, PERCENT_2
+
+from .common import percentiles, record, time_call, RESULTS_FILE
+
+PROCESSORS = (ROUND_2, ROUND_2, ROUND_2, ROUND_1, PERCENT_1, PERCENT_2)
+
+
+def snapshot(keys: int) -> tuple[dict, dict]:
+    """A snapshot of keys numeric values, mostly floats like the controller reports, and a processor per key"""
+    rng = random.Random(0)
+    data = {}
+    key_processors = {}
+
+    for i in range(keys):
+        key = "register{}".format(i)
+        data[key] = rng.uniform(-20, 120) if i % 8 else rng.randint(0, 100)
+        key_processors[key] = PROCESSORS[i % len(PROCESSORS)]
+
+    return data, key_processors
+
+
+def bench(keys: int, changed_fraction: float, repeat: int) -> dict:
+    data, key_processors = snapshot(keys)
+    changed = random.Random(1).sample(sorted(data), round(keys * changed_fraction))
+    batch = BatchProcessor()
+
+    for key, processor in key_processors.items():
+        batch.register(key, processor)
+
+    def per_entity():
+        for key in changed:
+            key_processors[key](data[key])
+
+    cases = {
+        "per entity": per_entity,
+        "coordinator": lambda: batch.process(data, changed)
+    }
+
+    return {
+        "{} keys {} changed {} ms".format(keys, len(changed), name): percentiles(time_call(case, repeat))
+        for name, case in cases.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--changed", type=float, default=0.2, help="fraction of the keys changed per refresh")
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--no-record", action="store_true", help="do not append the results to the log")
+    args = parser.parse_args()
+
+    results = {}
+
+    for keys in args.keys:
+        results.update(bench(keys, args.changed, args.repeat))
+
+    record("processing", results, None if args.no_record else RESULTS_FILE)
+
+
+if __name__ == "__main__":
+    main()
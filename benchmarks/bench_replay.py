@@ -0,0 +1,135 @@
+"""Replays a recorded controller trace through the api and the coordinator.
+
+    python -m benchmarks.bench_replay TRACE [--speed 60] [--profile] [--no-record]
+    python -m benchmarks.bench_replay TRACE --record-simulator 2880 [--extra-keys 200]
+
+Traces are recorded by the integration (trace_file option) or, with --record-simulator, from the local simulator.
+Without --speed every poll of the trace is replayed back to back. Every poll is a refresh of an
+EconetDataCoordinator over an Econet300Api backed by a ReplayClient, with one subscriber per key in place of the
+entities, so it runs the whole update pipeline without HA state writes. The full refresh interval is scaled by the
+speed; without a speed only the first refresh is a full one.
+"""
+import argparse
+import asyncio
+import cProfile
+import pstats
+import tempfile
+import time
+
+from aiohttp import ClientSession
+from homeassistant.core import HomeAssistant
+
+from custom_components.econet300.api import EconetClient, Econet300Api
+from custom_components.econet300.common import EconetDataCoordinator
+from custom_components.econet300.const import API_REG_PARAMS_URI, FULL_REFRESH_INTERVAL
+from custom_components.econet300.mem_cache import MemCache
+from custom_components.econet300.trace import Trace, TraceRecorder, ReplayClient
+
+from .common import percentiles, record, RESULTS_FILE
+from .simulator import EconetSimulator, SimulatorConfig
+
+
+async def record_simulator(path: str, polls: int, extra_keys: int):
+    """Record polls regParams reads of the simulator, plus the sysParams and limits reads of the setup"""
+    simulator = EconetSimulator(SimulatorConfig(extra_keys=extra_keys, seed=0))
+    await simulator.start()
+
+    try:
+        async with ClientSession() as session:
+            recorder = TraceRecorder(path, simulator.url)
+            client = EconetClient(simulator.url, "admin", "admin", session, recorder=recorder)
+            api = await Econet300Api.create(client, MemCache())
+            await api.get_param_limits("tempCOSet")
+
+            for _ in range(polls):
+                await api.fetch_data()
+
+            await recorder.async_flush()
+    finally:
+        await simulator.stop()
+
+    print("Recorded {} responses to {}".format(recorder.records, path))
+
+
+async def replay(trace: Trace, speed: float | None) -> dict:
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+
+        try:
+            return await _replay(hass, trace, speed)
+        finally:
+            await hass.async_stop(force=True)
+
+
+async def _replay(hass: HomeAssistant, trace: Trace, speed: float | None) -> dict:
+    api = await Econet300Api.create(ReplayClient(trace, speed), MemCache())
+    full_refresh_interval = FULL_REFRESH_INTERVAL / speed if speed is not None else FULL_REFRESH_INTERVAL
+    coordinator = EconetDataCoordinator(hass, api, full_refresh_interval=full_refresh_interval)
+    poll_times = [r["t"] for r in trace.by_url.get("/econet/{}".format(API_REG_PARAMS_URI), ())]
+    subscribed = set()
+    samples = []
+    failed = 0
+    replay_started = time.monotonic()
+
+    for poll_time in poll_times:
+        # At a replay speed the polls follow the cadence of the trace
+        if speed is not None:
+            await asyncio.sleep(max(0.0, replay_started + poll_time / speed - time.monotonic()))
+
+        started = time.perf_counter()
+        await coordinator.async_refresh()
+        samples.append(time.perf_counter() - started)
+
+        if not coordinator.last_update_success:
+            failed += 1
+            continue
+
+        # One subscriber per key in place of the entities, subscribed when the key first appears
+        for key in coordinator.data.keys() - subscribed:
+            coordinator.set_tolerance(key, 0.1)
+            coordinator.async_subscribe_key(key, lambda: None)
+            coordinator.async_require_keys((key,))
+            subscribed.add(key)
+
+    await api.async_close()
+
+    result = percentiles(samples)
+    result["polls"] = len(samples)
+    result["failed"] = failed
+    result["dispatched_per_poll"] = coordinator.write_stats()["emitted"] / len(samples) if samples else 0
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("trace")
+    parser.add_argument("--speed", type=float, default=None, help="replay speed, 1 is real time (default: fast)")
+    parser.add_argument("--profile", action="store_true", help="print the top functions of a cProfile run")
+    parser.add_argument("--record-simulator", type=int, metavar="POLLS", help="record a trace from the simulator")
+    parser.add_argument("--extra-keys", type=int, default=200)
+    parser.add_argument("--no-record", action="store_true", help="do not append the results to the log")
+    args = parser.parse_args()
+
+    if args.record_simulator:
+        asyncio.run(record_simulator(args.trace, args.record_simulator, args.extra_keys))
+        return
+
+    trace = Trace.load(args.trace)
+    profiler = cProfile.Profile() if args.profile else None
+
+    if profiler is not None:
+        profiler.enable()
+
+    results = asyncio.run(replay(trace, args.speed))
+
+    if profiler is not None:
+        profiler.disable()
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+
+    results["trace_duration_s"] = trace.duration
+    record("replay", results, None if args.no_record else RESULTS_FILE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Helpers shared by the benchmarks: timing, percentiles and the results log."""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+RESULTS_FILE = os.path.join(os.path.dirname(__file__), "results.jsonl")
+
+
+def percentiles(samples: list[float], points=(50, 90, 99)) -> dict:
+    """Return {"p50": ..., ...} of samples, in milliseconds"""
+    if not samples:
+        return {}
+
+    ordered = sorted(samples)
+    result = {}
+
+    for point in points:
+        index = min(len(ordered) - 1, round(point / 100 * (len(ordered) - 1)))
+        result["p{}".format(point)] = ordered[index] * 1000
+
+    result["mean"] = statistics.fmean(ordered) * 1000
+    return result
+
+
+def time_call(func, repeat: int) -> list[float]:
+    """Time repeat calls of func, returns the duration of every call in seconds"""
+    samples = []
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+
+    return samples
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(__file__),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def record(suite: str, results: dict, output: str | None = RESULTS_FILE):
+    """Print results and append them to the results log so that runs can be compared over time"""
+    entry = {
+        "suite": suite,
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+    for name, value in results.items():
+        print("{:<40} {}".format(name, _format(value)))
+
+    if output:
+        with open(output, "a", encoding="utf-8") as file:
+            file.write(json.dumps(entry) + "\n")
+
+
+def _format(value) -> str:
+    if isinstance(value, dict):
+        return "  ".join("{}={}".format(k, _format(v)) for k, v in value.items())
+
+    if isinstance(value, float):
+        return "{:.3f}".format(value)
+
+    return str(value)
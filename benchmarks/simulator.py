@@ -0,0 +1,223 @@
+"""Local stand-in for the ecoNET300 HTTP API.
+
+Serves sysParams, regParams, rmCurrNewParam and the editable params limits behind basic auth, with configurable
+latency, error rate, 401s and timeouts. Run standalone with:
+
+    python -m benchmarks.simulator --port 8300 --latency 0.2
+"""
+import argparse
+import asyncio
+import base64
+import random
+import time
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+REG_PARAMS_BASE = {
+    "tempFeeder": 35.0,
+    "fanPower": 40.0,
+    "tempFlueGas": 120.0,
+    "tempCO": 62.0,
+    "tempBack": 48.0,
+    "tempCWU": 45.0,
+    "tempExternalSensor": 5.0,
+    "boilerPower": 60.0,
+    "fuelLevel": 80.0,
+    "mode": 3,
+    "tempCOSet": 65,
+    "tempCWUSet": 50,
+    "pumpCWU": True,
+    "pumpCWUWorks": False,
+    "pumpCirculation": True,
+    "pumpCirculationWorks": False,
+    "pumpFireplace": True,
+    "pumpFireplaceWorks": True,
+    "pumpSolar": False,
+    "pumpSolarWorks": False,
+    "lighter": True,
+    "lighterWorks": False,
+}
+
+EDITABLE_PARAMS_LIMITS = {
+    "1280": {"min": 40, "max": 85},
+    "1281": {"min": 20, "max": 60},
+}
+
+
+@dataclass
+class SimulatorConfig:
+    username: str = "admin"
+    password: str = "admin"
+    # Mean response latency and its uniform jitter (seconds)
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    # Probabilities of a 500 response, a 401 response and a request that never answers in time
+    error_rate: float = 0.0
+    unauthorized_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout: float = 30.0
+    # Additional numeric registers, mimics installations with mixers, buffers etc.
+    extra_keys: int = 0
+    # Fraction of numeric registers that drift between two regParams requests
+    change_rate: float = 0.3
+    uid: str = "SIM0000000000000000001"
+    soft_ver: str = "1.0.sim"
+    seed: int | None = None
+
+
+@dataclass
+class SimulatorStats:
+    requests: dict = field(default_factory=dict)
+    errors: int = 0
+    unauthorized: int = 0
+    timeouts: int = 0
+    writes: dict = field(default_factory=dict)
+
+
+class EconetSimulator:
+    """aiohttp application answering like an ecoNET300 controller"""
+
+    def __init__(self, config: SimulatorConfig | None = None):
+        self.config = config or SimulatorConfig()
+        self.stats = SimulatorStats()
+        self._random = random.Random(self.config.seed)
+        self._reg_params = dict(REG_PARAMS_BASE)
+        self._reg_params.update({"extraReg{}".format(i): 20.0 + i % 50 for i in range(self.config.extra_keys)})
+        self._numeric_keys = [k for k, v in self._reg_params.items() if type(v) is float]
+        self._auth = "Basic " + base64.b64encode(
+            "{}:{}".format(self.config.username, self.config.password).encode()).decode()
+        self._runner: web.AppRunner | None = None
+        self.url = None
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/econet/sysParams", self._handle(self._sys_params))
+        app.router.add_get("/econet/regParams", self._handle(self._reg_params_doc))
+        app.router.add_get("/econet/rmCurrNewParam", self._handle(self._new_param))
+        app.router.add_get("/econet/rmCurrentDataParamsEdits", self._handle(self._limits))
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = "http://{}:{}".format(host, port)
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def set_reg_param(self, key: str, value):
+        self._reg_params[key] = value
+
+    def _handle(self, producer):
+        async def handler(request: web.Request) -> web.Response:
+            name = request.path.rsplit("/", 1)[-1]
+            self.stats.requests[name] = self.stats.requests.get(name, 0) + 1
+            config = self.config
+
+            if request.headers.get("Authorization") != self._auth or self._chance(config.unauthorized_rate):
+                self.stats.unauthorized += 1
+                return web.Response(status=401)
+
+            if self._chance(config.timeout_rate):
+                self.stats.timeouts += 1
+                await asyncio.sleep(config.timeout)
+
+            latency = config.latency + self._random.uniform(-config.latency_jitter, config.latency_jitter)
+            if latency > 0:
+                await asyncio.sleep(latency)
+
+            if self._chance(config.error_rate):
+                self.stats.errors += 1
+                return web.Response(status=500)
+
+            return web.json_response(producer(request))
+
+        return handler
+
+    def _chance(self, rate: float) -> bool:
+        return rate > 0 and self._random.random() < rate
+
+    def _sys_params(self, request: web.Request) -> dict:
+        return {
+            "uid": self.config.uid,
+            "softVer": self.config.soft_ver,
+            "moduleASoftVer": "S024.25",
+            "controllerID": "ecoMAX 860P3-O",
+        }
+
+    def _reg_params_doc(self, request: web.Request) -> dict:
+        for key in self._numeric_keys:
+            if self._chance(self.config.change_rate):
+                self._reg_params[key] = round(self._reg_params[key] + self._random.uniform(-0.5, 0.5), 2)
+
+        return {
+            "settingsVer": 1,
+            "editableParamsVer": 1,
+            "schemaVer": 1,
+            "tilesVer": 1,
+            "curr": self._reg_params,
+            "currUnits": {key: 1 for key in self._reg_params},
+        }
+
+    def _new_param(self, request: web.Request) -> dict:
+        key = request.query.get("newParamKey")
+        value = request.query.get("newParamValue")
+
+        if key is None or value is None:
+            return {"result": "ERROR"}
+
+        self.stats.writes[key] = value
+        return {"result": "OK"}
+
+    def _limits(self, request: web.Request) -> dict:
+        return {"data": EDITABLE_PARAMS_LIMITS}
+
+
+async def _serve(args):
+    simulator = EconetSimulator(SimulatorConfig(
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        unauthorized_rate=args.unauthorized_rate,
+        timeout_rate=args.timeout_rate,
+        extra_keys=args.extra_keys,
+    ))
+    url = await simulator.start(args.host, args.port)
+    print("ecoNET300 simulator listening on {} (admin/admin)".format(url))
+
+    started = time.monotonic()
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        print("Served {} in {:.0f}s".format(simulator.stats, time.monotonic() - started))
+        await simulator.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8300)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--unauthorized-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--extra-keys", type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,24 @@
 """The Example Integration integration."""
 from __future__ import annotations
 
+import logging
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
+from homeassistant.const import Platform, EVENT_HOMEASSISTANT_CLOSE
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady, ConfigEntryAuthFailed
 
-from .api import make_api
-from .common import AuthError, EconetDataCoordinator
+from .api import make_api, DataError, Econet300Api
+from .common import AuthError, ApiError, EconetDataCoordinator
+from .hub import async_get_hub
 from .mem_cache import MemCache
-from .const import DOMAIN, SERVICE_API, SERVICE_COORDINATOR
+from .snapshot_store import SnapshotStore, async_remove_snapshot
+from .const import DOMAIN, SERVICE_API, SERVICE_COORDINATOR, SERVICE_DISCOVERY, SERVICE_DEVICE_INFOS, \
+    CONF_MAX_POLL_INTERVAL, POLL_INTERVAL_MAX, CONF_TRACE_FILE
+
+_LOGGER = logging.getLogger(__name__)
 
-PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR]
+PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR, Platform.NUMBER]
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -20,30 +27,91 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.data.setdefault(DOMAIN, {})
 
     cache = MemCache()
+    store = SnapshotStore(hass, entry.entry_id)
+    await store.async_load()
+
+    # With a stored snapshot entities are created right away and the controller is queried in the background
+    restore = store.sys_params() is not None and store.reg_params() is not None
+
+    try:
+        api = await make_api(hass, cache, entry.data, store.sys_params() if restore else None,
+                             entry.options.get(CONF_TRACE_FILE))
+    except AuthError as auth_error:
+        raise ConfigEntryAuthFailed("Client not authenticated")
+    except (TimeoutError, ApiError) as timeout_error:
+        raise ConfigEntryNotReady("Target not found")
 
     try:
-        api = await make_api(hass, cache, entry.data)
+        coordinator = EconetDataCoordinator(hass, api,
+                                            entry.options.get(CONF_MAX_POLL_INTERVAL, POLL_INTERVAL_MAX), store)
 
-        coordinator = EconetDataCoordinator(hass, api)
-        await coordinator.async_config_entry_first_refresh()
+        if restore:
+            coordinator.async_restore(store.reg_params())
+        else:
+            await coordinator.async_config_entry_first_refresh()
+            store.async_save_sys_params(api.sys_params())
+    except BaseException:
+        await api.async_close()
+        raise
 
-        hass.data[DOMAIN][entry.entry_id] = {
-            SERVICE_API: api,
-            SERVICE_COORDINATOR: coordinator
-        }
+    # Not done by Econet300Api.init, the api of the config flow is closed right after it
+    api.prefetch_limits()
 
-        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-        return True
+    # Imported at setup instead of with the package, it pulls in the sensor and binary sensor components
+    from .discovery import EntityDiscovery
+    discovery = EntityDiscovery(coordinator, api)
 
-    except AuthError as auth_error:
-        raise ConfigEntryAuthFailed("Client not authenticated")
-    except TimeoutError as timeout_error:
-        raise ConfigEntryNotReady("Target not found")
+    hass.data[DOMAIN][entry.entry_id] = {
+        SERVICE_API: api,
+        SERVICE_COORDINATOR: coordinator,
+        SERVICE_DISCOVERY: discovery,
+        # DeviceInfo of the controller and its sub devices, built once and dropped on unload
+        SERVICE_DEVICE_INFOS: {}
+    }
+
+    async def _async_close_api(_event):
+        await api.async_close()
+
+    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close_api))
+    entry.async_on_unload(async_get_hub(hass).async_register(entry.entry_id, coordinator))
+    entry.async_on_unload(api.add_write_listener(coordinator.async_params_written))
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    entry.async_on_unload(discovery.async_stop)
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    # Started once the entities exist, so that only the keys they need are fetched
+    if restore:
+        hass.async_create_task(_async_live_refresh(api, coordinator, store))
+
+    return True
+
+
+async def _async_live_refresh(api: Econet300Api, coordinator: EconetDataCoordinator, store: SnapshotStore):
+    """Replace the restored snapshot with live data, entities become unavailable if it fails"""
+    try:
+        await api.init()
+        store.async_save_sys_params(api.sys_params())
+    except (AuthError, ApiError, DataError, TimeoutError) as error:
+        _LOGGER.warning("Could not fetch sys params, using stored ones: %r", error)
+
+    await coordinator.async_refresh()
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload a config entry after its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        data = hass.data[DOMAIN].pop(entry.entry_id)
+        await data[SERVICE_API].async_close()
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored snapshot of a removed entry."""
+    await async_remove_snapshot(hass, entry.entry_id)
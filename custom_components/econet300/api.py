@@ -1,18 +1,31 @@
 import asyncio
 import logging
+import time
 from http import HTTPStatus
-from typing import Any
+from typing import Any, Callable, Iterable, TYPE_CHECKING
 
-from aiohttp import ClientSession, BasicAuth
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from aiohttp import ClientSession, BasicAuth, ClientError, ClientTimeout, TCPConnector
 
 from .const import API_SYS_PARAMS_PARAM_UID, API_SYS_PARAMS_URI, API_REG_PARAMS_URI, API_REG_PARAMS_PARAM_DATA, \
-    API_SYS_PARAMS_PARAM_SW_REV
+    API_SYS_PARAMS_PARAM_SW_REV, API_REQUEST_TIMEOUT, API_EDITABLE_PARAMS_LIMITS_URI, API_EDITABLE_PARAMS_LIMITS_DATA, \
+    API_EDITABLE_PARAMS_LIMITS_DURATION, API_EDITABLE_PARAMS_LIMITS_STALE_DURATION, API_CONNECT_TIMEOUT, \
+    API_CONNECTION_LIMIT_PER_HOST, API_KEEPALIVE_TIMEOUT, API_DNS_CACHE_TTL, EDITABLE_PARAMS_MAPPING_TABLE, \
+    API_NEW_PARAM_URI, METRICS_DECODE
+from .json_decoder import decode
 from .mem_cache import MemCache
+from .metrics import Metrics
+from .retry import RetryPolicy, CircuitBreaker
+from .write_queue import WriteQueue
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+    from .trace import TraceRecorder
 
 _LOGGER = logging.getLogger(__name__)
 
+CLIENT_TIMEOUT = ClientTimeout(total=API_REQUEST_TIMEOUT, connect=API_CONNECT_TIMEOUT)
+
 
 class Limits:
     def __init__(self, min_v: float, max_v: float):
@@ -20,6 +33,11 @@ class Limits:
         self.max = max_v
 
 
+def map_param(param_name: str) -> str | None:
+    """Index of an editable param, None if the param is not editable"""
+    return EDITABLE_PARAMS_MAPPING_TABLE.get(param_name)
+
+
 class AuthError(Exception):
     """AuthError"""
 
@@ -28,12 +46,18 @@ class ApiError(Exception):
     """AuthError"""
 
 
+class CircuitOpenError(ApiError):
+    """CircuitOpenError"""
+
+
 class DataError(Exception):
     """DataError"""
 
 
 class EconetClient:
-    def __init__(self, host: str, username: str, password: str, session: ClientSession) -> None:
+    def __init__(self, host: str, username: str, password: str, session: ClientSession,
+                 retry_policy: RetryPolicy | None = None, breaker: CircuitBreaker | None = None,
+                 metrics: Metrics | None = None, recorder: "TraceRecorder | None" = None) -> None:
         """Initialize."""
 
         proto = ["http://", "https://"]
@@ -47,48 +71,192 @@ class EconetClient:
         self._host = host
         self._session = session
         self._auth = BasicAuth(username, password)
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._breaker = breaker or CircuitBreaker()
+        self._metrics = metrics or Metrics()
+        self._recorder = recorder
+        self._requests = 0
+        self._attempts = 0
+        self._retries = 0
+        self._timeouts = 0
+        self._failures = 0
+        self._last_error = None
+        self._in_flight: dict[tuple, asyncio.Future] = {}
+        self._coalesced = 0
+        # (url, sections) -> (body, decoded) of the last read, an unchanged body is not decoded again
+        self._last_responses: dict[tuple, tuple[bytes, Any]] = {}
+        self._decode_skipped = 0
 
     def host(self):
         return self._host
 
+    def metrics(self) -> Metrics:
+        return self._metrics
+
+    async def async_close(self):
+        if self._recorder is not None:
+            await self._recorder.async_flush()
+
+        await self._session.close()
+
+    def diagnostics(self) -> dict:
+        return {
+            "circuit": self._breaker.diagnostics(),
+            "requests": self._requests,
+            "attempts": self._attempts,
+            "retries": self._retries,
+            "timeouts": self._timeouts,
+            "failures": self._failures,
+            "last_error": self._last_error,
+            "coalesced": self._coalesced,
+            "decode_skipped": self._decode_skipped
+        }
+
     async def set_param(self, key: str, value: str):
-        url = "{}/econet/rmCurrNewParam?newParamKey={}&newParamValue={}".format(
-            self._host, key, value
+        url = "{}/econet/{}?newParamKey={}&newParamValue={}".format(
+            self._host, API_NEW_PARAM_URI, key, value
         )
 
-        return await self._get(url)
+        return await self._get(url, endpoint=API_NEW_PARAM_URI)
 
-    async def get_params(self, reg: str):
+    async def get_params(self, reg: str, sections: tuple[str, ...] | None = None):
+        """Fetch reg, keeping only the given top-level sections of the document if sections are given"""
         url = "{}/econet/{}".format(self._host, reg)
 
-        return await self._get(url)
+        return await self._get_coalesced(url, sections, reg)
+
+    async def _get_coalesced(self, url, sections=None, endpoint=None):
+        """Share a single in-flight request (and its result) between concurrent readers of the same url.
+
+        The shared result must be treated as read-only by the callers.
+        """
+        key = (url, sections)
+        request = self._in_flight.get(key)
+
+        if request is None:
+            request = asyncio.ensure_future(self._get(url, sections, reuse=True, endpoint=endpoint))
+            request.add_done_callback(lambda r: self._on_request_done(key, r))
+            self._in_flight[key] = request
+        else:
+            _LOGGER.debug("Joining in-flight request: %s", url)
+            self._coalesced += 1
+
+        # Shielded so that a cancelled reader does not cancel the request for the others
+        return await asyncio.shield(request)
+
+    def _on_request_done(self, key, request: asyncio.Future):
+        if self._in_flight.get(key) is request:
+            del self._in_flight[key]
+
+        # Mark the error as retrieved in case every reader was cancelled in the meantime
+        if not request.cancelled():
+            request.exception()
 
-    async def _get(self, url):
+    async def _get(self, url, sections=None, reuse: bool = False, endpoint=None):
+        policy = self._retry_policy
+        metrics = self._metrics
+        deadline = time.monotonic() + policy.deadline
         attempt = 0
-        max_attempts = 5
+        self._requests += 1
+
+        while True:
+            if not self._breaker.allow_request():
+                raise CircuitOpenError("Circuit open, not querying: {}".format(self._host))
+
+            probing = self._breaker.state == CircuitBreaker.HALF_OPEN
+            attempt += 1
+            self._attempts += 1
+            remaining = deadline - time.monotonic()
+            timeout = CLIENT_TIMEOUT if remaining >= API_REQUEST_TIMEOUT else ClientTimeout(total=remaining,
+                                                                                             connect=API_CONNECT_TIMEOUT)
+            started = time.perf_counter() if metrics.enabled else None
 
-        while ++attempt <= max_attempts:
             try:
-                async with await self._session.get(url, auth=self._auth, timeout=10) as resp:
+                async with await self._session.get(url, auth=self._auth, timeout=timeout) as resp:
+                    # Any HTTP answer means the controller is reachable
+                    self._breaker.record_success()
+
+                    if resp.status != HTTPStatus.OK:
+                        if self._recorder is not None:
+                            self._recorder.record(url, resp.status)
 
-                    if resp.status == HTTPStatus.UNAUTHORIZED:
-                        raise AuthError
+                        if resp.status == HTTPStatus.UNAUTHORIZED:
+                            raise AuthError
 
-                    elif resp.status != HTTPStatus.OK:
                         return None
 
-                    return await resp.json()
-            except TimeoutError as error:
-                _LOGGER.warning("Timeout error, retry({}/{})".format(attempt, max_attempts))
-                await asyncio.sleep(1)
+                    body = await resp.read()
+
+                    if self._recorder is not None:
+                        self._recorder.record(url, resp.status, body)
+
+                    if started is not None:
+                        metrics.observe_latency(endpoint or url, time.perf_counter() - started)
+
+                    return self._decode(url, body, sections, reuse)
+            except (asyncio.TimeoutError, ClientError) as error:
+                self._breaker.record_failure()
+                self._last_error = repr(error)
+
+                if self._recorder is not None:
+                    self._recorder.record_error(url, error)
+
+                if isinstance(error, asyncio.TimeoutError):
+                    self._timeouts += 1
+
+                delay = policy.delay(attempt)
+                if attempt >= policy.max_attempts or time.monotonic() + delay >= deadline:
+                    self._failures += 1
+                    raise ApiError("Request failed after {} attempt(s): {}".format(attempt, url)) from error
+
+                _LOGGER.warning("Request error: %r, retry(%s/%s)", error, attempt, policy.max_attempts)
+                self._retries += 1
+            finally:
+                # A probe which was cancelled or raised anything else must not block the later requests
+                if probing:
+                    self._breaker.release_probe()
+
+            await asyncio.sleep(delay)
+
+
+    def _decode(self, url, body: bytes, sections, reuse: bool):
+        key = (url, sections)
+        last = self._last_responses.get(key) if reuse else None
+
+        # Documents like the params limits rarely change, comparing the bytes is much cheaper than parsing them
+        if last is not None and last[0] == body:
+            self._decode_skipped += 1
+            return last[1]
+
+        started = time.perf_counter() if self._metrics.enabled else None
+
+        try:
+            data = decode(body, sections)
+        except ValueError as error:
+            raise ApiError("Invalid JSON received from: {}".format(url)) from error
+
+        if started is not None:
+            self._metrics.observe_latency(METRICS_DECODE, time.perf_counter() - started)
+
+        if reuse:
+            self._last_responses[key] = (body, data)
+
+        return data
 
 
 class Econet300Api:
-    def __init__(self, client: EconetClient, cache: MemCache) -> None:
+    def __init__(self, client: EconetClient, cache: MemCache,
+                 limits_stale_duration: float = API_EDITABLE_PARAMS_LIMITS_STALE_DURATION) -> None:
         self._client = client
         self._cache = cache
+        self._limits_stale_duration = limits_stale_duration
         self._uid = "default-uid"
         self._sw_revision = "default-sw-revision"
+        self._write_queue = WriteQueue(self._write_param)
+        self._required_keys: frozenset | None = None
+        self._full_keys: frozenset | None = None
+        self._reg_params: dict | None = None
+        self._prefetch: asyncio.Future | None = None
 
     @classmethod
     async def create(cls, client: EconetClient, cache: MemCache):
@@ -106,9 +274,34 @@ class Econet300Api:
     def sw_rev(self) -> str:
         return self._sw_revision
 
+    @classmethod
+    def restore(cls, client: EconetClient, cache: MemCache, sys_params: dict):
+        """Create the api from previously stored sys params, without querying the controller"""
+        c = cls(client, cache)
+        c._apply_sys_params(sys_params)
+
+        return c
+
+    def sys_params(self) -> dict:
+        return {
+            API_SYS_PARAMS_PARAM_UID: self._uid,
+            API_SYS_PARAMS_PARAM_SW_REV: self._sw_revision
+        }
+
     async def init(self):
         sys_params = await self._client.get_params(API_SYS_PARAMS_URI)
 
+        if sys_params is None:
+            raise DataError("Data fetched by API for reg: " + API_SYS_PARAMS_URI + " is None")
+
+        self._apply_sys_params(sys_params)
+
+    def prefetch_limits(self):
+        """Warm up the limits in the background so that the number entities don't wait for them"""
+        self._prefetch = self._cache.prefetch(API_EDITABLE_PARAMS_LIMITS_DATA, self._fetch_limits,
+                                              API_EDITABLE_PARAMS_LIMITS_DURATION, self._limits_stale_duration)
+
+    def _apply_sys_params(self, sys_params: dict):
         if API_SYS_PARAMS_PARAM_UID not in sys_params:
             _LOGGER.warning("{} not in sys_params - cannot set proper UUID".format(API_SYS_PARAMS_PARAM_UID))
         else:
@@ -119,7 +312,32 @@ class Econet300Api:
         else:
             self._sw_revision = sys_params[API_SYS_PARAMS_PARAM_SW_REV]
 
-    async def set_param(self, param, value) -> bool:
+    def set_param(self, param, value) -> asyncio.Future:
+        """Queue a write of param, the returned future resolves to True once the controller accepted it"""
+        return self._write_queue.submit(param, value)
+
+    def add_write_listener(self, listener) -> Callable[[], None]:
+        """Register a callback receiving {param: value} after every batch of successful writes"""
+        return self._write_queue.add_listener(listener)
+
+    def metrics(self) -> Metrics:
+        return self._client.metrics()
+
+    def diagnostics(self) -> dict:
+        return {
+            "client": self._client.diagnostics(),
+            "writes": self._write_queue.diagnostics(),
+            "cache": self._cache.stats()
+        }
+
+    async def async_close(self):
+        if self._prefetch is not None and not self._prefetch.done():
+            self._prefetch.cancel()
+
+        await self._write_queue.async_close()
+        await self._client.async_close()
+
+    async def _write_param(self, param, value) -> bool:
         param_idx = map_param(param)
         if param_idx is None:
             _LOGGER.warning("Requested param set for: '{}' but mapping for this param does not exist".format(param))
@@ -137,15 +355,36 @@ class Econet300Api:
         
         return True
 
-    async def fetch_data(self):
-        return await self._fetch_reg_key(API_REG_PARAMS_URI, API_REG_PARAMS_PARAM_DATA)
+    def set_required_keys(self, keys: Iterable[str] | None, slow_keys: Iterable[str] = ()):
+        """Limit the data returned by fetch_data to keys, full fetches return slow_keys too. None returns all of
+        them."""
+        self._required_keys = frozenset(keys) if keys else None
+        self._full_keys = self._required_keys | frozenset(slow_keys) if keys else None
 
-    async def get_param_limits(self, param: str):
-        if not self._cache.exists(API_EDITABLE_PARAMS_LIMITS_DATA):
-            limits = await self._fetch_reg_key(API_EDITABLE_PARAMS_LIMITS_URI, API_EDITABLE_PARAMS_LIMITS_DATA)
-            self._cache.set(API_EDITABLE_PARAMS_LIMITS_DATA, limits)
+    def reg_params(self) -> dict | None:
+        """All the reg params of the last full fetch"""
+        return self._reg_params
+
+    async def fetch_data(self, full: bool = True):
+        """Fetch the reg params, limited to the required keys and to the slow keys too if full is set.
 
-        limits = self._cache.get(API_EDITABLE_PARAMS_LIMITS_DATA)
+        All the reg params of a full fetch are kept for reg_params, there is a single copy of them.
+        """
+        data = await self._fetch_reg_key(API_REG_PARAMS_URI, API_REG_PARAMS_PARAM_DATA)
+
+        if full:
+            self._reg_params = data
+
+        keys = self._full_keys if full else self._required_keys
+
+        if keys is None:
+            return data
+
+        return {key: data[key] for key in keys if key in data}
+
+    async def get_param_limits(self, param: str):
+        limits = await self._cache.get_or_load(API_EDITABLE_PARAMS_LIMITS_DATA, self._fetch_limits,
+                                               API_EDITABLE_PARAMS_LIMITS_DURATION, self._limits_stale_duration)
         param_idx = map_param(param)
 
         if param_idx is None:
@@ -161,8 +400,11 @@ class Econet300Api:
         return Limits(curr_limits["min"], curr_limits["max"])
 
 
+    async def _fetch_limits(self):
+        return await self._fetch_reg_key(API_EDITABLE_PARAMS_LIMITS_URI, API_EDITABLE_PARAMS_LIMITS_DATA)
+
     async def _fetch_reg_key(self, reg, data_key):
-        data = await self._client.get_params(reg)
+        data = await self._client.get_params(reg, (data_key,))
 
         if data is None:
             raise DataError("Data fetched by API for reg: " + reg + " is None")
@@ -174,11 +416,48 @@ class Econet300Api:
         return data[data_key]
 
 
-async def make_api(hass: HomeAssistant, cache: MemCache, data: dict):
-    return await Econet300Api.create(
-        EconetClient(
-            data["host"],
-            data["username"],
-            data["password"],
-            async_get_clientsession(hass)
-        ), cache)
+def create_session() -> ClientSession:
+    """Session with a connection pool of its own, tuned for the slow, single-threaded web server of the controller.
+
+    Keeps the traffic out of the limits of the shared HA session and reuses a single kept-alive connection.
+    """
+    connector = TCPConnector(
+        limit_per_host=API_CONNECTION_LIMIT_PER_HOST,
+        keepalive_timeout=API_KEEPALIVE_TIMEOUT,
+        use_dns_cache=True,
+        ttl_dns_cache=API_DNS_CACHE_TTL
+    )
+
+    return ClientSession(connector=connector, timeout=CLIENT_TIMEOUT)
+
+
+async def make_api(hass: "HomeAssistant", cache: MemCache, data: dict, sys_params: dict | None = None,
+                   trace_file: str | None = None):
+    """Create the api, from stored sys_params if given, otherwise by querying the controller.
+
+    The traffic is recorded to trace_file if given. The api owns its session, it has to be closed with
+    Econet300Api.async_close.
+    """
+    recorder = None
+
+    if trace_file:
+        from .trace import TraceRecorder
+
+        recorder = TraceRecorder(hass.config.path(trace_file), data["host"])
+
+    client = EconetClient(
+        data["host"],
+        data["username"],
+        data["password"],
+        create_session(),
+        recorder=recorder
+    )
+
+    if sys_params is not None:
+        return Econet300Api.restore(client, cache, sys_params)
+
+    try:
+        return await Econet300Api.create(client, cache)
+    except BaseException:
+        await client.async_close()
+        raise
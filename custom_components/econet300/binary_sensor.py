@@ -1,21 +1,22 @@
+import logging
 from dataclasses import dataclass
-from typing import Callable, Any
+from functools import partial
+from typing import TYPE_CHECKING
 
 from homeassistant.components.binary_sensor import BinarySensorEntityDescription, BinarySensorDeviceClass, \
     BinarySensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .common import EconetDataCoordinator, Econet300Api
-
-from .const import DOMAIN, SERVICE_COORDINATOR, SERVICE_API, DEVICE_INFO_CONTROLLER_NAME, DEVICE_INFO_MODEL, \
-    DEVICE_INFO_MANUFACTURER
-
-import logging
-
+from .const import DOMAIN, SERVICE_COORDINATOR, SERVICE_API, SERVICE_DISCOVERY
 from .entity import EconetEntity
 
+if TYPE_CHECKING:
+    from .discovery import DiscoveredKey
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -23,6 +24,8 @@ _LOGGER = logging.getLogger(__name__)
 class EconetBinarySensorEntityDescription(BinarySensorEntityDescription):
     """Describes Econet binary sensor entity."""
     availability_key: str = ""
+    # Sub device of the entity, e.g. mixer-1, None for the controller
+    device: str | None = None
 
 
 BINARY_SENSOR_TYPES: tuple[EconetBinarySensorEntityDescription, ...] = (
@@ -81,9 +84,15 @@ class ControllerBinarySensor(EconetEntity, EconetBinarySensor):
                  api: Econet300Api):
         super().__init__(description, coordinator, api)
 
+    def _slow_keys(self) -> tuple[str, ...]:
+        if not self.entity_description.availability_key:
+            return super()._slow_keys()
+
+        return (self.entity_description.availability_key,)
+
 
 def can_add(desc: EconetBinarySensorEntityDescription, coordinator: EconetDataCoordinator):
-    return coordinator.has_data(desc.availability_key) and coordinator.data[desc.availability_key] is not False
+    return coordinator.has_data(desc.availability_key) and coordinator.fetched_value(desc.availability_key) is not False
 
 
 def create_binary_sensors(coordinator: EconetDataCoordinator, api: Econet300Api):
@@ -92,11 +101,26 @@ def create_binary_sensors(coordinator: EconetDataCoordinator, api: Econet300Api)
         if can_add(description, coordinator):
             entities.append(ControllerBinarySensor(description, coordinator, api))
         else:
-            _LOGGER.debug("Availability key: " + description.key + " does not exist, entity will not be "
-                                                                   "added")
+            _LOGGER.debug("Availability key: %s does not exist, entity will not be added", description.key)
 
     return entities
 
+
+def create_discovered_binary_sensor(coordinator: EconetDataCoordinator, api: Econet300Api,
+                                    discovered: "DiscoveredKey"):
+    pattern = discovered.pattern
+
+    description = EconetBinarySensorEntityDescription(
+        key=discovered.key,
+        name=discovered.name,
+        device=discovered.device,
+        icon=pattern.icon,
+        device_class=pattern.device_class
+    )
+
+    return ControllerBinarySensor(description, coordinator, api)
+
+
 async def async_setup_entry(
         hass: HomeAssistant,
         entry: ConfigEntry,
@@ -110,4 +134,13 @@ async def async_setup_entry(
     entities: list[ControllerBinarySensor] = []
     entities = entities + create_binary_sensors(coordinator, api)
 
-    return async_add_entities(entities)
+    async_add_entities(entities)
+
+    hass.data[DOMAIN][entry.entry_id][SERVICE_DISCOVERY].async_add_platform(
+        Platform.BINARY_SENSOR,
+        [description.key for description in BINARY_SENSOR_TYPES],
+        lambda discovered: create_discovered_binary_sensor(coordinator, api, discovered),
+        async_add_entities,
+        [(partial(can_add, description, coordinator), partial(ControllerBinarySensor, description, coordinator, api))
+         for description in BINARY_SENSOR_TYPES if not can_add(description, coordinator)]
+    )
@@ -0,0 +1,57 @@
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ChangeTracker:
+    """Tracks which snapshot keys changed since their value was last emitted"""
+
+    def __init__(self):
+        self._reference = dict()
+        self._tolerances = dict()
+        self.emitted = 0
+        self.suppressed = 0
+
+    def set_tolerance(self, key: str, tolerance: float):
+        self._tolerances[key] = tolerance
+
+    def diff(self, data: dict, partial: bool = False) -> set:
+        """Return keys of data which differ from the last emitted values.
+
+        Keys missing from data count as changed (removed) unless data is partial.
+        """
+        changed = set()
+
+        for key, value in data.items():
+            if key in self._reference and not self._differs(key, self._reference[key], value):
+                continue
+
+            self._reference[key] = value
+            changed.add(key)
+
+        if partial:
+            return changed
+
+        for key in self._reference.keys() - data.keys():
+            del self._reference[key]
+            changed.add(key)
+
+        return changed
+
+    def stats(self) -> dict:
+        return {
+            "emitted": self.emitted,
+            "suppressed": self.suppressed
+        }
+
+    def _differs(self, key: str, old, new) -> bool:
+        tolerance = self._tolerances.get(key, 0)
+
+        if tolerance and _is_number(old) and _is_number(new):
+            return abs(new - old) > tolerance
+
+        return old != new
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
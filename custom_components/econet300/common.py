@@ -1,13 +1,24 @@
 import logging
+import time
 from datetime import timedelta
-from typing import Any
+from typing import Any, Callable, Iterable
 
 import async_timeout
+from homeassistant.core import callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .api import Econet300Api, AuthError, ApiError
-from .const import DOMAIN
+from .change_tracker import ChangeTracker
+from .derived import DerivedValues
+from .dispatcher import KeyDispatcher
+from .filters import GlitchFilter, SampleFilter
+from .const import DOMAIN, POLL_INTERVAL_MAX, API_FETCH_TIMEOUT, METRICS_REFRESH, METRICS_ENTITY_WRITES, \
+    FULL_REFRESH_INTERVAL
+from .poll_scheduler import AdaptivePollScheduler, SCHEDULER_KEYS
+from .processors import BatchProcessor
+from .snapshot_store import SnapshotStore
+from .timeseries import TimeSeries
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -15,35 +26,340 @@ _LOGGER = logging.getLogger(__name__)
 class EconetDataCoordinator(DataUpdateCoordinator):
     """My custom coordinator."""
 
-    def __init__(self, hass, api: Econet300Api):
+    def __init__(self, hass, api: Econet300Api, max_poll_interval: float = POLL_INTERVAL_MAX,
+                 store: SnapshotStore | None = None, full_refresh_interval: float = FULL_REFRESH_INTERVAL):
         """Initialize my coordinator."""
+        scheduler = AdaptivePollScheduler(max_interval=max_poll_interval)
+
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            # Polling interval. Will only be polled if there are subscribers.
-            update_interval=timedelta(seconds=30),
+            # Polls are scheduled by the EconetHub using poll_interval(), which is adjusted after every poll.
+            update_interval=None,
         )
         self._api = api
+        self._metrics = api.metrics()
+        self._scheduler = scheduler
+        self._poll_interval = scheduler.interval()
+        self._tracker = ChangeTracker()
+        self._changed_keys: set | None = None
+        self._store = store
+        self._dispatcher = KeyDispatcher()
+        self._remove_dispatch_listener = None
+        self._required_keys: dict[str, int] = {}
+        # Keys of entities which are fetched by the full refreshes only
+        self._slow_keys: dict[str, int] = {}
+        self._series: dict[str, TimeSeries] = {}
+        self._derived = DerivedValues()
+        self._processing = BatchProcessor()
+        self._filter = GlitchFilter()
+        self._full_refresh_interval = full_refresh_interval
+        self._last_full_refresh: float | None = None
+        # Monotonic time of the fetch which last returned each key
+        self._fetched_at: dict[str, float] = {}
 
     def has_data(self, key: str):
-        return key in self.data
+        """Whether key is in the snapshot or, if no entity requires it, in the last full fetch"""
+        return key in self.data or key in (self._api.reg_params() or ())
+
+    def fetched_value(self, key: str):
+        """Unprocessed value of key in the snapshot or, if no entity requires it, in the last full fetch"""
+        if key in self.data:
+            return self.data[key]
+
+        return (self._api.reg_params() or {}).get(key)
+
+    def has_subscribers(self) -> bool:
+        return bool(self._dispatcher)
+
+    def poll_interval(self) -> timedelta:
+        return self._poll_interval
+
+    def changed_keys(self) -> set | None:
+        """Keys changed by the last refresh, None if all entities were notified"""
+        return self._changed_keys
+
+    @callback
+    def async_restore(self, data: dict):
+        """Seed the coordinator with a stored snapshot until the first live fetch completes"""
+        # Refreshes update the snapshot in place, it must not be the dict of the store
+        self.data = dict(data)
+        self._tracker.diff(data)
+        self._derived.restore(data)
+        self._processing.process(data, data.keys())
+
+    def set_tolerance(self, key: str, tolerance: float):
+        """Set how much a numeric value may drift before it counts as a change"""
+        self._tracker.set_tolerance(key, tolerance)
+
+    @callback
+    def async_subscribe_key(self, key: str, update_callback: Callable[[], None]) -> Callable[[], None]:
+        """Call update_callback after every refresh in which the value of key changed"""
+        remove_subscription = self._dispatcher.subscribe(key, update_callback)
+
+        # A single coordinator listener dispatches to all subscribers
+        if self._remove_dispatch_listener is None:
+            self._remove_dispatch_listener = self.async_add_listener(self._async_dispatch)
+
+        @callback
+        def remove():
+            remove_subscription()
+
+            if not self._dispatcher and self._remove_dispatch_listener is not None:
+                self._remove_dispatch_listener()
+                self._remove_dispatch_listener = None
+
+        return remove
+
+    @callback
+    def async_require_keys(self, keys: Iterable[str], slow_keys: Iterable[str] = ()) -> Callable[[], None]:
+        """Fetch only the keys required by entities, slow_keys by the full refreshes only. Returns a callable
+        releasing them."""
+        keys = tuple(keys)
+        slow_keys = tuple(slow_keys)
+
+        _count_keys(self._required_keys, keys, 1)
+        _count_keys(self._slow_keys, slow_keys, 1)
+        self._update_required_keys()
+        self._fill_keys(keys + slow_keys)
+
+        @callback
+        def release():
+            _count_keys(self._required_keys, keys, -1)
+            _count_keys(self._slow_keys, slow_keys, -1)
+            self._update_required_keys()
+
+        return release
+
+    def _fill_keys(self, keys: Iterable[str]):
+        """Patch keys the snapshot lacks in from the last full fetch, e.g. the keys of entities added after it"""
+        reg_params = self._api.reg_params()
+
+        if not self.data or not reg_params:
+            return
+
+        missing = {key: reg_params[key] for key in keys if key not in self.data and key in reg_params}
+
+        if not missing:
+            return
+
+        data, _ = self._filter.filter(time.monotonic(), missing)
+        self.data.update(data)
+        self._processing.process(self.data, data)
+
+        if self._last_full_refresh is not None:
+            self._fetched_at.update(dict.fromkeys(data, self._last_full_refresh))
+
+    @callback
+    def async_register_filter(self, key: str, sample_filter: SampleFilter) -> Callable[[], None]:
+        """Filter glitched values of key on every refresh, returns a callable unregistering the filter"""
+        self._filter.register(key, sample_filter)
+
+        if self.data and key in self.data:
+            # The current value was fetched before the filter existed, a glitch without a value to hold is dropped
+            data, _ = self._filter.filter(time.monotonic(), {key: self.data[key]})
+
+            if key in data:
+                self.data[key] = data[key]
+            else:
+                del self.data[key]
+
+        @callback
+        def remove():
+            self._filter.unregister(key)
+
+        return remove
+
+    def filter_status(self, key: str) -> dict:
+        """State attributes marking a filtered value of key"""
+        return self._filter.status(key)
+
+    def filter_stats(self) -> dict:
+        return self._filter.stats()
+
+    @callback
+    def async_register_processor(self, key: str, processor: Callable[[Any], Any]) -> Callable[[], None]:
+        """Process the values of key with processor on every refresh, returns a callable unregistering it"""
+        self._processing.register(key, processor, self.data)
+
+        @callback
+        def remove():
+            self._processing.unregister(key)
+
+        return remove
+
+    def value(self, key: str):
+        """Value of key for entities, processed if a processor is registered for it"""
+        return self._processing.value(key, self.data)
+
+    @callback
+    def async_track_statistics(self, key: str) -> Callable[[], None]:
+        """Keep a time series with rolling statistics of key, returns a callable dropping it"""
+        self._series.setdefault(key, TimeSeries())
+
+        @callback
+        def remove():
+            self._series.pop(key, None)
+
+        return remove
+
+    def data_ages(self) -> dict:
+        """Seconds since the keys were last fetched, per key required by entities (None if it was never fetched,
+        e.g. restored from the store) and over all the keys of the snapshot"""
+        now = time.monotonic()
+        ages = [now - fetched_at for fetched_at in self._fetched_at.values()]
+
+        return {
+            "keys": len(ages),
+            "newest": min(ages, default=None),
+            "oldest": max(ages, default=None),
+            "last_full_refresh": None if self._last_full_refresh is None else now - self._last_full_refresh,
+            "required": {
+                key: None if key not in self._fetched_at else now - self._fetched_at[key]
+                for key in sorted(self._required_keys)
+            }
+        }
+
+    def statistics(self, key: str) -> dict:
+        """Rolling statistics of a tracked key as state attributes"""
+        series = self._series.get(key)
+
+        return series.attributes() if series is not None else {}
+
+    def _update_required_keys(self):
+        if not self._required_keys:
+            self._api.set_required_keys(None)
+            return
+
+        self._api.set_required_keys(self._required_keys.keys() | set(SCHEDULER_KEYS), self._slow_keys)
+
+    @callback
+    def _async_dispatch(self):
+        calls = self._dispatcher.dispatch(self._changed_keys)
+
+        self._tracker.emitted += calls
+        self._tracker.suppressed += len(self._dispatcher) - calls
+
+        if self._metrics.enabled:
+            self._metrics.observe_count(METRICS_ENTITY_WRITES, calls)
+
+    @callback
+    def async_params_written(self, params: dict):
+        """Patch the written values into the snapshot, the controller accepted them so no refetch is needed"""
+        if not self.data:
+            return
+
+        _LOGGER.debug("Params written: %s", params)
+
+        data = {**self.data, **{key: value for key, value in params.items() if key in self.data}}
+        changed = self._tracker.diff(data)
+
+        if not changed:
+            return
+
+        self._processing.process(data, changed)
+
+        if self._store is not None:
+            self._store.async_update_reg_params({key: data[key] for key in changed})
+
+        # Entities went unavailable on a previous failure, all of them have to write their state again
+        self._changed_keys = changed if self.last_update_success else None
+        self.async_set_updated_data(data)
+
+    def write_stats(self) -> dict:
+        return self._tracker.stats()
 
     async def _async_update_data(self):
         """Fetch data from API endpoint.
 
-        This is the place to pre-process the data to lookup tables
-        so entities can quickly look up their data.
+        Every full_refresh_interval all the reg params are fetched, the keys required by entities and their slow
+        keys replace the snapshot. The refreshes in between only process the required keys and patch them into the
+        snapshot.
         """
+        full = self.data is None or self._last_full_refresh is None \
+            or time.monotonic() - self._last_full_refresh >= self._full_refresh_interval
 
-        _LOGGER.debug("Fetching data from API")
+        _LOGGER.debug("Fetching data from API, full: %s", full)
+        started = time.perf_counter() if self._metrics.enabled else None
 
         try:
             # Note: asyncio.TimeoutError and aiohttp.ClientError are already
             # handled by the data update coordinator.
-            async with async_timeout.timeout(10):
-                return await self._api.fetch_data()
+            async with async_timeout.timeout(API_FETCH_TIMEOUT):
+                data = await self._api.fetch_data(full)
         except AuthError as err:
+            self._changed_keys = None
             raise ConfigEntryAuthFailed from err
         except ApiError as err:
+            self._on_failure()
             raise UpdateFailed(f"Error communicating with API: {err}")
+        except Exception:
+            self._on_failure()
+            raise
+
+        now = time.monotonic()
+        data, filter_toggled = self._filter.filter(now, data)
+        data = self._add_derived(now, data)
+        self._append_series(now, data)
+
+        # A full fetch returns every key of the snapshot, keys it lacks are gone
+        if full:
+            self._fetched_at = dict.fromkeys(data, now)
+        else:
+            self._fetched_at.update(dict.fromkeys(data, now))
+
+        # Entities write their filter mark even if the held value didn't change
+        changed = self._tracker.diff(data, partial=not full) | filter_toggled
+        self._processing.process(data, changed)
+
+        if full:
+            self._last_full_refresh = now
+            snapshot = dict(data)
+        else:
+            snapshot = self.data
+            snapshot.update(data)
+
+        if self._store is not None:
+            if full:
+                # Drops the keys no entity requires any more
+                self._store.async_save_reg_params(snapshot)
+            elif changed:
+                self._store.async_update_reg_params({key: data[key] for key in changed if key in data})
+
+        # Entities went unavailable on the previous failure, all of them have to write their state again
+        self._changed_keys = changed if self.last_update_success else None
+        self._poll_interval = self._scheduler.on_success(snapshot, self._changed_keys)
+
+        if started is not None:
+            self._metrics.observe_latency(METRICS_REFRESH, time.perf_counter() - started)
+
+        return snapshot
+
+    def _add_derived(self, now: float, data: dict) -> dict:
+        """Return data extended by the values derived incrementally from its samples"""
+        derived = self._derived.update(now, data)
+
+        # The fetched dict may be shared with the response cache of the client, it must not be modified
+        return {**data, **derived} if derived else data
+
+    def _append_series(self, now: float, data: dict):
+        for key, series in self._series.items():
+            value = data.get(key)
+
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                series.append(now, value)
+
+    def _on_failure(self):
+        self._changed_keys = None
+        self._poll_interval = self._scheduler.on_failure()
+
+
+def _count_keys(counts: dict[str, int], keys: Iterable[str], delta: int):
+    for key in keys:
+        count = counts.get(key, 0) + delta
+
+        if count:
+            counts[key] = count
+        else:
+            del counts[key]
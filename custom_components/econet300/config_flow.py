@@ -7,14 +7,14 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 
+from .api import make_api, AuthError, ApiError
+from .const import DOMAIN, CONF_ENTRY_TITLE, CONF_ENTRY_DESCRIPTION, CONF_MAX_POLL_INTERVAL, POLL_INTERVAL_MAX, \
+    CONF_TRACE_FILE, POLL_INTERVAL_BASE
 from .mem_cache import MemCache
-from .common import AuthError
-from .api import make_api
-from .const import DOMAIN, CONF_ENTRY_TITLE, CONF_ENTRY_DESCRIPTION
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -30,16 +30,16 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
 
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect. """
-
     cache = MemCache()
     info = {}
 
     try:
         api = await make_api(hass, cache, data)
         info["uid"] = api.uid()
+        await api.async_close()
     except AuthError as auth_error:
         raise InvalidAuth
-    except TimeoutError as timeout_error:
+    except (TimeoutError, ApiError) as timeout_error:
         raise CannotConnect
 
     return info
@@ -50,6 +50,12 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_user(
             self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -85,6 +91,35 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
 
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle options of an ecoNET300 entry."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        self.config_entry = config_entry
+
+    async def async_step_init(
+            self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_MAX_POLL_INTERVAL,
+                    default=self.config_entry.options.get(CONF_MAX_POLL_INTERVAL, POLL_INTERVAL_MAX)
+                ): vol.All(vol.Coerce(int), vol.Range(min=POLL_INTERVAL_BASE)),
+                vol.Optional(
+                    CONF_TRACE_FILE,
+                    default=self.config_entry.options.get(CONF_TRACE_FILE, "")
+                ): str,
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=schema)
+
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
@@ -4,14 +4,104 @@ DOMAIN = "econet300"
 
 SERVICE_API = "api"
 SERVICE_COORDINATOR = "coordinator"
+SERVICE_HUB = "hub"
+SERVICE_DISCOVERY = "discovery"
+SERVICE_DEVICE_INFOS = "device_infos"
 
 DEVICE_INFO_MANUFACTURER = "PLUM"
 DEVICE_INFO_MODEL = "ecoNET300"
 DEVICE_INFO_CONTROLLER_NAME = "PLUM ecoNET300"
 DEVICE_INFO_MIXER_NAME = "Mixer"
+# Kind of a sub device, the device of mixer 1 is "mixer-1"
+DEVICE_MIXER = "mixer"
 
 CONF_ENTRY_TITLE = "ecoNET300"
 CONF_ENTRY_DESCRIPTION = "PLUM Econet300"
+CONF_MAX_POLL_INTERVAL = "max_poll_interval"
+# Path of a file the controller traffic is recorded to, not recorded if empty
+CONF_TRACE_FILE = "trace_file"
+
+## Polling (seconds)
+POLL_INTERVAL_MIN = 10
+POLL_INTERVAL_BASE = 30
+POLL_INTERVAL_MAX = 300
+POLL_BACKOFF_FACTOR = 2
+# Polls of all controllers run from a single timer ticking every HUB_TICK_INTERVAL
+HUB_TICK_INTERVAL = 1
+# Seconds between full fetches, the polls in between only process the keys required by entities
+FULL_REFRESH_INTERVAL = 600
+HUB_MAX_CONCURRENCY = 2
+# Flue gas slope (degrees per minute) above which the boiler is considered to be in a transient state
+POLL_FLUE_GAS_SLOPE = 2.0
+
+## Requests (seconds)
+API_REQUEST_TIMEOUT = 10
+API_CONNECT_TIMEOUT = 5
+# The controller serves one request at a time, more connections only queue up on its side
+API_CONNECTION_LIMIT_PER_HOST = 2
+# Idle connections are closed before the controller drops them, a dropped kept-alive connection costs a retry
+API_KEEPALIVE_TIMEOUT = 15
+API_DNS_CACHE_TTL = 300
+API_RETRY_MAX_ATTEMPTS = 3
+API_RETRY_BASE_DELAY = 1
+API_RETRY_MAX_DELAY = 8
+API_RETRY_DEADLINE = 25
+API_RETRY_JITTER = 0.5
+API_CIRCUIT_FAILURE_THRESHOLD = 5
+API_CIRCUIT_COOLDOWN = 60
+# Minimum time between two consecutive param writes
+API_WRITE_MIN_SPACING = 1
+# Upper bound for a single coordinator fetch, covers all retries of a request
+API_FETCH_TIMEOUT = 30
+
+## Storage
+STORAGE_VERSION = 1
+# Delay (seconds) from the first change of the snapshot to its write, the changes of the polls in between are
+# written with it
+STORAGE_SAVE_DELAY = 600
+
+## Cache
+MEM_CACHE_MAX_SIZE = 128
+MEM_CACHE_DEFAULT_DURATION = 60
+
+## Time series
+# Samples kept per key, windows longer than the buffered span only cover the buffered samples
+TIMESERIES_CAPACITY = 1024
+TIMESERIES_WINDOWS = {"15m": 900, "1h": 3600, "6h": 21600}
+
+## Glitch filters
+# Consecutive slew rate rejections after which a step counts as real
+FILTER_MAX_REJECTED = 3
+FILTER_RANGE = "range"
+FILTER_SLEW = "slew"
+FILTER_MEDIAN = "median"
+
+## Derived values
+# Half-life (seconds) of the samples in the fuel burn rate regression
+FUEL_RATE_HALF_LIFE = 21600
+# Span (seconds) the regression has to cover before a burn rate is reported
+FUEL_RATE_MIN_SPAN = 3600
+# Rise of the fuel level (%) between two samples which counts as a refill
+FUEL_REFILL_THRESHOLD = 5
+# Samples further apart (seconds) are not integrated, the boiler state in between is unknown
+BOILER_OUTPUT_MAX_GAP = 900
+DERIVED_FUEL_BURN_RATE = "fuelBurnRate"
+DERIVED_FUEL_TIME_TO_EMPTY = "fuelTimeToEmpty"
+DERIVED_BOILER_OUTPUT_HOURS = "boilerOutputHours"
+
+## Traces
+TRACE_VERSION = 1
+# Records buffered before they are written to the trace file
+TRACE_FLUSH_SIZE = 100
+
+## Metrics
+# Upper bounds of the latency histogram buckets (ms)
+METRICS_LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Upper bounds of the buckets of the per refresh count histograms
+METRICS_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+METRICS_DECODE = "decode"
+METRICS_REFRESH = "refresh"
+METRICS_ENTITY_WRITES = "entity_writes"
 
 ## Sys params
 API_SYS_PARAMS_URI = "sysParams"
@@ -21,3 +111,21 @@ API_SYS_PARAMS_PARAM_SW_REV = "softVer"
 ## Reg params
 API_REG_PARAMS_URI = "regParams"
 API_REG_PARAMS_PARAM_DATA = "curr"
+API_REG_PARAMS_PARAM_MODE = "mode"
+API_REG_PARAMS_PARAM_LIGHTER_WORKS = "lighterWorks"
+API_REG_PARAMS_PARAM_TEMP_FLUE_GAS = "tempFlueGas"
+API_REG_PARAMS_PARAM_FUEL_LEVEL = "fuelLevel"
+API_REG_PARAMS_PARAM_BOILER_POWER = "boilerPower"
+
+## Editable params
+API_NEW_PARAM_URI = "rmCurrNewParam"
+API_EDITABLE_PARAMS_LIMITS_URI = "rmCurrentDataParamsEdits"
+API_EDITABLE_PARAMS_LIMITS_DATA = "data"
+# Param name -> index of the param in rmCurrNewParam and in the limits
+EDITABLE_PARAMS_MAPPING_TABLE = {
+    "tempCOSet": "1280",
+    "tempCWUSet": "1281",
+}
+# Limits are served from cache for the duration, then stale (refreshed in the background) until the hard expiry
+API_EDITABLE_PARAMS_LIMITS_DURATION = 60
+API_EDITABLE_PARAMS_LIMITS_STALE_DURATION = 3600
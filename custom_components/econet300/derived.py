@@ -0,0 +1,142 @@
+import logging
+import math
+
+from .const import API_REG_PARAMS_PARAM_FUEL_LEVEL, API_REG_PARAMS_PARAM_BOILER_POWER, DERIVED_FUEL_BURN_RATE, \
+    DERIVED_FUEL_TIME_TO_EMPTY, DERIVED_BOILER_OUTPUT_HOURS, FUEL_REFILL_THRESHOLD, FUEL_RATE_HALF_LIFE, \
+    FUEL_RATE_MIN_SPAN, BOILER_OUTPUT_MAX_GAP
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FuelTracker:
+    """Fuel burn rate from an exponentially weighted online linear regression of the fuel level over time.
+
+    A rise of the level by more than the refill threshold starts a new regression, so refills never count as
+    negative consumption. The rate of the previous regression is reported until the new one spans enough time.
+    """
+
+    def __init__(self, half_life: float = FUEL_RATE_HALF_LIFE, refill_threshold: float = FUEL_REFILL_THRESHOLD,
+                 min_span: float = FUEL_RATE_MIN_SPAN):
+        self._decay_rate = math.log(2) / half_life
+        self._refill_threshold = refill_threshold
+        self._min_span = min_span
+        self._previous_rate = None
+        self._reset()
+
+    def _reset(self):
+        # Times are kept in hours relative to the origin of the regression, to keep the sums well-conditioned
+        self._origin = None
+        self._last_time = None
+        self._last_level = None
+        self._sw = self._st = self._sv = self._stt = self._stv = 0.0
+
+    def add(self, timestamp: float, level: float):
+        if self._last_level is not None and level - self._last_level > self._refill_threshold:
+            _LOGGER.debug("Fuel refill detected: %s -> %s", self._last_level, level)
+            self._previous_rate = self.burn_rate()
+            self._reset()
+
+        if self._origin is None:
+            self._origin = timestamp
+
+        t = (timestamp - self._origin) / 3600
+
+        if self._last_time is not None:
+            decay = math.exp(-self._decay_rate * (timestamp - self._last_time))
+            self._sw *= decay
+            self._st *= decay
+            self._sv *= decay
+            self._stt *= decay
+            self._stv *= decay
+
+        self._sw += 1
+        self._st += t
+        self._sv += level
+        self._stt += t * t
+        self._stv += t * level
+
+        self._last_time = timestamp
+        self._last_level = level
+
+    def burn_rate(self) -> float | None:
+        """Fuel consumption in %/h, None until the regression spans enough time"""
+        if self._last_time is None or self._last_time - self._origin < self._min_span:
+            return self._previous_rate
+
+        denominator = self._sw * self._stt - self._st * self._st
+        if denominator <= 0:
+            return self._previous_rate
+
+        slope = (self._sw * self._stv - self._st * self._sv) / denominator
+
+        return max(0.0, -slope)
+
+    def time_to_empty(self) -> float | None:
+        """Hours until the fuel level reaches 0 at the current burn rate"""
+        rate = self.burn_rate()
+
+        if not rate or self._last_level is None:
+            return None
+
+        return self._last_level / rate
+
+
+class OutputIntegrator:
+    """Cumulative boiler output in full-power hours, integrated with the trapezoidal rule over every sample"""
+
+    def __init__(self, max_gap: float = BOILER_OUTPUT_MAX_GAP):
+        self._max_gap = max_gap
+        self._total = 0.0
+        self._last_time = None
+        self._last_power = None
+
+    def restore(self, total: float | None):
+        if total is not None:
+            self._total = total
+
+    def add(self, timestamp: float, power: float):
+        if self._last_time is not None and 0 < timestamp - self._last_time <= self._max_gap:
+            hours = (timestamp - self._last_time) / 3600
+            self._total += (self._last_power + power) / 2 / 100 * hours
+
+        self._last_time = timestamp
+        self._last_power = power
+
+    def total(self) -> float:
+        return self._total
+
+
+class DerivedValues:
+    """Computes the derived values of a controller from every new snapshot"""
+
+    def __init__(self):
+        self._fuel = FuelTracker()
+        self._output = OutputIntegrator()
+
+    def restore(self, data: dict):
+        self._output.restore(data.get(DERIVED_BOILER_OUTPUT_HOURS))
+
+    def update(self, timestamp: float, data: dict) -> dict:
+        """Add the samples of data and return the derived values for the keys whose source is present"""
+        derived = {}
+
+        level = data.get(API_REG_PARAMS_PARAM_FUEL_LEVEL)
+        if _is_number(level):
+            self._fuel.add(timestamp, level)
+            derived[DERIVED_FUEL_BURN_RATE] = _round(self._fuel.burn_rate(), 2)
+            derived[DERIVED_FUEL_TIME_TO_EMPTY] = _round(self._fuel.time_to_empty(), 1)
+
+        power = data.get(API_REG_PARAMS_PARAM_BOILER_POWER)
+        if _is_number(power):
+            self._output.add(timestamp, power)
+            derived[DERIVED_BOILER_OUTPUT_HOURS] = round(self._output.total(), 3)
+
+        return derived
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _round(value: float | None, digits: int) -> float | None:
+    return None if value is None else round(value, digits)
@@ -0,0 +1,37 @@
+"""Diagnostics support for ecoNET300."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, SERVICE_API, SERVICE_COORDINATOR, SERVICE_HUB
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics of a config entry, metrics are only collected while a debug sensor is enabled."""
+    api = hass.data[DOMAIN][entry.entry_id][SERVICE_API]
+    coordinator = hass.data[DOMAIN][entry.entry_id][SERVICE_COORDINATOR]
+    hub = hass.data[DOMAIN].get(SERVICE_HUB)
+    changed_keys = coordinator.changed_keys()
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "api": api.diagnostics(),
+        "metrics": api.metrics().diagnostics(),
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "poll_interval": coordinator.poll_interval().total_seconds(),
+            "changed_keys": None if changed_keys is None else sorted(changed_keys),
+            "writes": coordinator.write_stats(),
+            "filters": coordinator.filter_stats(),
+            "data_age": coordinator.data_ages()
+        },
+        "hub": hub.diagnostics().get(entry.entry_id) if hub is not None else None,
+        "data": coordinator.data
+    }
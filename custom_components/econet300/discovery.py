@@ -0,0 +1,266 @@
+"""Entities generated from the reg params keys of the controller.
+
+Every key is matched against KEY_PATTERNS once, the first matching pattern describes its entity. The entity is added
+when its key first has a value, keys described by the hand-written entity descriptions of any platform (and the
+editable params, which are number entities) are left to them. Hand-written
+entities which could not be added at setup are checked again after every full fetch.
+"""
+import logging
+import re
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from homeassistant.components.binary_sensor import BinarySensorDeviceClass
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.const import Platform, TEMP_CELSIUS, PERCENTAGE
+from homeassistant.core import callback
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .api import Econet300Api
+from .common import EconetDataCoordinator
+from .const import DEVICE_MIXER, EDITABLE_PARAMS_MAPPING_TABLE
+from .filters import SampleFilter, TEMP_RANGE_FILTER
+
+_LOGGER = logging.getLogger(__name__)
+
+_WORDS = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+
+@dataclass(frozen=True)
+class KeyPattern:
+    """Describes the entities of the keys fully matching pattern"""
+
+    pattern: re.Pattern
+    platform: Platform
+    # Format string of the humanized groups of the match, the humanized key if None
+    name: str | None = None
+    icon: str | None = None
+    unit: str | None = None
+    device_class: str | None = None
+    # Digits the value is rounded to, None keeps it as is
+    precision: int | None = None
+    tolerance: float = 0
+    # Kind of the sub device the entity belongs to, indexed by the first group of the match
+    device: str | None = None
+    sample_filter: SampleFilter | None = None
+
+
+@dataclass(frozen=True)
+class DiscoveredKey:
+    """A key matched by a pattern"""
+
+    key: str
+    name: str
+    pattern: KeyPattern
+    # Sub device of the entity, e.g. mixer-1, None for the controller
+    device: str | None = None
+
+
+KEY_PATTERNS: tuple[KeyPattern, ...] = (
+    KeyPattern(
+        pattern=re.compile(r"mixerTemp(\d+)"),
+        platform=Platform.SENSOR,
+        name="Mixer {} temperature",
+        device=DEVICE_MIXER,
+        icon="mdi:thermometer",
+        unit=TEMP_CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        precision=2,
+        tolerance=0.1,
+        sample_filter=TEMP_RANGE_FILTER
+    ),
+    KeyPattern(
+        pattern=re.compile(r"mixerSetTemp(\d+)"),
+        platform=Platform.SENSOR,
+        name="Mixer {} set temperature",
+        device=DEVICE_MIXER,
+        icon="mdi:thermometer",
+        unit=TEMP_CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        precision=1
+    ),
+    KeyPattern(
+        pattern=re.compile(r"mixerPumpWorks(\d+)"),
+        platform=Platform.BINARY_SENSOR,
+        name="Mixer {} pump",
+        device=DEVICE_MIXER,
+        icon="mdi:pump",
+        device_class=BinarySensorDeviceClass.RUNNING
+    ),
+    KeyPattern(
+        pattern=re.compile(r"temp\w+"),
+        platform=Platform.SENSOR,
+        icon="mdi:thermometer",
+        unit=TEMP_CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        precision=2,
+        tolerance=0.1,
+        sample_filter=TEMP_RANGE_FILTER
+    ),
+    KeyPattern(
+        pattern=re.compile(r"lambdaLevel"),
+        platform=Platform.SENSOR,
+        name="Lambda oxygen level",
+        icon="mdi:gauge",
+        unit=PERCENTAGE,
+        precision=1,
+        tolerance=0.1
+    ),
+    KeyPattern(
+        pattern=re.compile(r"\w+Power"),
+        platform=Platform.SENSOR,
+        icon="mdi:gauge",
+        unit=PERCENTAGE,
+        precision=2
+    ),
+    KeyPattern(
+        pattern=re.compile(r"(\w+)Works"),
+        platform=Platform.BINARY_SENSOR,
+        name="{}",
+        icon="mdi:cog",
+        device_class=BinarySensorDeviceClass.RUNNING
+    ),
+)
+
+
+def humanize(key: str) -> str:
+    """tempUpperBuffer -> Temp upper buffer, pumpCO -> Pump CO"""
+    words = [word if word.isupper() else word.lower() for word in _WORDS.findall(key)]
+
+    if not words:
+        return key
+
+    return " ".join([words[0][:1].upper() + words[0][1:]] + words[1:])
+
+
+def match_key(key: str, patterns: Iterable[KeyPattern] = KEY_PATTERNS) -> DiscoveredKey | None:
+    for pattern in patterns:
+        match = pattern.pattern.fullmatch(key)
+
+        if match is None:
+            continue
+
+        if pattern.name is None:
+            name = humanize(key)
+        else:
+            name = pattern.name.format(*(humanize(group) for group in match.groups()))
+
+        device = None if pattern.device is None else f"{pattern.device}-{match.group(1)}"
+
+        return DiscoveredKey(key, name, pattern, device)
+
+    return None
+
+
+class EntityDiscovery:
+    """Adds the entities of discovered keys to their platforms once the keys have a value.
+
+    Every key is matched only once, later refreshes only look at new keys and at the matched keys still waiting for
+    a value. Nothing is added before every platform of the patterns was added, so that the hand-written keys of all
+    of them are known.
+    """
+
+    def __init__(self, coordinator: EconetDataCoordinator, api: Econet300Api,
+                 patterns: tuple[KeyPattern, ...] = KEY_PATTERNS):
+        self._coordinator = coordinator
+        self._api = api
+        self._patterns = patterns
+        self._matched_keys: set[str] = set()
+        self._pending: dict[Platform, dict[str, DiscoveredKey]] = {}
+        self._platforms: dict[Platform, tuple[Callable[[DiscoveredKey], Entity], AddEntitiesCallback]] = {}
+        # Keys with a hand-written entity on any platform
+        self._known_keys: set[str] = set(EDITABLE_PARAMS_MAPPING_TABLE)
+        self._deferred: dict[Platform, list[tuple[Callable[[], bool], Callable[[], Entity]]]] = {}
+        self._last_data = None
+        self._remove_listener = None
+
+    @callback
+    def async_add_platform(self, platform: Platform, known_keys: Iterable[str],
+                           factory: Callable[[DiscoveredKey], Entity], async_add_entities: AddEntitiesCallback,
+                           deferred: Iterable[tuple[Callable[[], bool], Callable[[], Entity]]] = ()):
+        """Add the entities of platform created by factory, keys in known_keys already have an entity.
+
+        deferred are (can_add, create) pairs of the hand-written entities that could not be added yet.
+        """
+        self._platforms[platform] = (factory, async_add_entities)
+        self._known_keys.update(known_keys)
+        self._deferred[platform] = list(deferred)
+
+        if self._remove_listener is None:
+            self._remove_listener = self._coordinator.async_add_listener(self._async_discover)
+
+        self._last_data = None
+        self._async_discover()
+
+    @callback
+    def async_stop(self):
+        if self._remove_listener is not None:
+            self._remove_listener()
+            self._remove_listener = None
+
+    @callback
+    def _async_discover(self):
+        if not self._platforms.keys() >= {pattern.platform for pattern in self._patterns}:
+            return
+
+        # The coordinator data holds the keys of the existing entities only, the full fetches return all the keys
+        data = self._api.reg_params()
+
+        if not data or data is self._last_data:
+            return
+
+        self._last_data = data
+        self._match_new_keys(data)
+
+        for platform, (factory, async_add_entities) in self._platforms.items():
+            entities = self._take_deferred(platform)
+            pending = self._pending.get(platform)
+
+            if not pending and not entities:
+                continue
+
+            ready = [key for key in pending if data.get(key) is not None] if pending else []
+
+            for key in ready:
+                discovered = pending.pop(key)
+
+                if key not in self._known_keys:
+                    entities.append(factory(discovered))
+
+            if entities:
+                _LOGGER.debug("Discovered %d %s entities", len(entities), platform)
+                async_add_entities(entities)
+
+    def _take_deferred(self, platform: Platform) -> list[Entity]:
+        deferred = self._deferred.get(platform)
+
+        if not deferred:
+            return []
+
+        entities = []
+        waiting = []
+
+        for can_add, create in deferred:
+            if can_add():
+                entities.append(create())
+            else:
+                waiting.append((can_add, create))
+
+        self._deferred[platform] = waiting
+
+        return entities
+
+    def _match_new_keys(self, data: dict):
+        new_keys = data.keys() - self._matched_keys
+
+        if not new_keys:
+            return
+
+        for key in new_keys:
+            discovered = match_key(key, self._patterns)
+
+            if discovered is not None:
+                self._pending.setdefault(discovered.pattern.platform, {})[key] = discovered
+
+        self._matched_keys.update(new_keys)
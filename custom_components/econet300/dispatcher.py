@@ -0,0 +1,46 @@
+import logging
+from typing import Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class KeyDispatcher:
+    """Index of snapshot key -> update callbacks of the entities bound to that key"""
+
+    def __init__(self):
+        self._subscribers: dict[str, list[Callable[[], None]]] = {}
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def subscribe(self, key: str, update_callback: Callable[[], None]) -> Callable[[], None]:
+        """Subscribe to key, returns a callable removing the subscription"""
+        self._subscribers.setdefault(key, []).append(update_callback)
+        self._count += 1
+
+        def remove():
+            subscribers = self._subscribers[key]
+            subscribers.remove(update_callback)
+            self._count -= 1
+
+            if not subscribers:
+                del self._subscribers[key]
+
+        return remove
+
+    def dispatch(self, keys: set | None) -> int:
+        """Call the subscribers of the given keys (all subscribers for None), returns the number of calls"""
+        if keys is None:
+            keys = self._subscribers.keys()
+        elif len(keys) > len(self._subscribers):
+            keys = self._subscribers.keys() & keys
+
+        calls = 0
+
+        for key in list(keys):
+            for update_callback in self._subscribers.get(key, ()):
+                update_callback()
+                calls += 1
+
+        return calls
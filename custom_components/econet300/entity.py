@@ -2,27 +2,69 @@ import logging
 from dataclasses import dataclass
 
 from homeassistant.core import callback
-from homeassistant.helpers.entity import DeviceInfo, EntityDescription
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.helpers.entity import DeviceInfo, EntityDescription, Entity
 
 from .api import Econet300Api
 from .common import EconetDataCoordinator
 from .const import DEVICE_INFO_CONTROLLER_NAME, DEVICE_INFO_MANUFACTURER, DEVICE_INFO_MODEL, DOMAIN, \
-    DEVICE_INFO_MIXER_NAME
+    DEVICE_INFO_MIXER_NAME, DEVICE_MIXER, SERVICE_DEVICE_INFOS
 
 _LOGGER = logging.getLogger(__name__)
 
-class EconetEntity(CoordinatorEntity):
+_SUB_DEVICE_NAMES = {DEVICE_MIXER: DEVICE_INFO_MIXER_NAME}
+
+
+def device_info(entity: Entity, api: Econet300Api, device: str | None = None) -> DeviceInfo:
+    """DeviceInfo of the controller (device None) or of one of its sub devices, e.g. mixer-1.
+
+    Built once per device and shared by the entities of the config entry of entity.
+    """
+    device_infos = entity.hass.data[DOMAIN][entity.platform.config_entry.entry_id][SERVICE_DEVICE_INFOS]
+    cache_key = (api.sw_rev(), device)
+    info = device_infos.get(cache_key)
+
+    if info is not None:
+        return info
+
+    if device is None:
+        info = DeviceInfo(
+            identifiers={(DOMAIN, api.uid())},
+            name=DEVICE_INFO_CONTROLLER_NAME,
+            manufacturer=DEVICE_INFO_MANUFACTURER,
+            model=DEVICE_INFO_MODEL,
+            configuration_url=api.host(),
+            sw_version=api.sw_rev()
+        )
+    else:
+        kind, _, index = device.partition("-")
+        info = DeviceInfo(
+            identifiers={(DOMAIN, f"{api.uid()}-{device}")},
+            name=f"{_SUB_DEVICE_NAMES.get(kind, kind)} {index}".strip(),
+            manufacturer=DEVICE_INFO_MANUFACTURER,
+            model=DEVICE_INFO_MODEL,
+            via_device=(DOMAIN, api.uid())
+        )
+
+    device_infos[cache_key] = info
+
+    return info
+
+
+class EconetEntity(Entity):
     """Representes EconetEntity"""
 
+    _attr_should_poll = False
+
     def __init__(self, description: EntityDescription, coordinator: EconetDataCoordinator,
                  api: Econet300Api):
-        super().__init__(coordinator)
-
         self.entity_description = description
 
         self._api = api
         self._coordinator = coordinator
+        # Sub device of the entity, None for the controller itself
+        self._device = getattr(description, "device", None)
+
+        coordinator.set_tolerance(description.key, getattr(description, "tolerance", 0))
 
     @property
     def unique_id(self) -> str | None:
@@ -32,41 +74,66 @@ class EconetEntity(CoordinatorEntity):
     @property
     def device_info(self) -> DeviceInfo | None:
         """Return device info of the entity"""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._api.uid())},
-            name=DEVICE_INFO_CONTROLLER_NAME,
-            manufacturer=DEVICE_INFO_MANUFACTURER,
-            model=DEVICE_INFO_MODEL,
-            configuration_url=self._api.host(),
-            sw_version=self._api.sw_rev()
-        )
+        return device_info(self, self._api, self._device)
 
     @property
     def name(self) -> str:
         """Return the name of the entity."""
         return self.entity_description.name
 
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return self._coordinator.last_update_success
+
     @callback
     def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        _LOGGER.debug("Update EconetEntity, entity name:" + self.entity_description.name)
+        """Handle updated data from the coordinator, called only when the value of the entity key changed."""
+        _LOGGER.debug("Update EconetEntity, entity name: %s", self.entity_description.name)
 
-        if self._coordinator.data[self.entity_description.key] is None:
-            return
+        value = self._coordinator.value(self.entity_description.key)
 
-        value = self._coordinator.data[self.entity_description.key]
+        if value is None:
+            return
 
         self._sync_state(value)
 
     async def async_added_to_hass(self):
         """Handle added to hass."""
-        _LOGGER.debug("Added to HASS:" + self.entity_description.name)
+        _LOGGER.debug("Added to HASS: %s", self.entity_description.name)
 
-        if self._coordinator.data[self.entity_description.key] is None:
-            _LOGGER.warning("Data key: " + self.entity_description.key + " was expected to exist but it doesn't")
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._coordinator.async_subscribe_key(self.entity_description.key, self._handle_coordinator_update)
+        )
+        self.async_on_remove(self._coordinator.async_require_keys(self._required_keys(), self._slow_keys()))
+
+        value = self._coordinator.value(self.entity_description.key)
+
+        if value is None:
+            if self._coordinator.filter_status(self.entity_description.key):
+                _LOGGER.debug("Data key: %s has no value yet, its samples were filtered",
+                              self.entity_description.key)
+            elif not self._value_expected():
+                _LOGGER.debug("Data key: %s has no value yet", self.entity_description.key)
+            else:
+                _LOGGER.warning("Data key: %s was expected to exist but it doesn't", self.entity_description.key)
             return
 
-        value = self._coordinator.data[self.entity_description.key]
-
-        await super().async_added_to_hass()
         self._sync_state(value)
+
+    def _required_keys(self) -> tuple[str, ...]:
+        """Keys which have to be fetched for this entity"""
+        return (self.entity_description.key,)
+
+    def _value_expected(self) -> bool:
+        """Whether the key has a value as soon as the entity is added"""
+        return True
+
+    def _slow_keys(self) -> tuple[str, ...]:
+        """Keys of this entity which rarely change, they are fetched by the full refreshes only"""
+        return ()
+
+    async def async_update(self) -> None:
+        """Update the entity, only used by the generic entity update service."""
+        await self._coordinator.async_request_refresh()
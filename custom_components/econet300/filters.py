@@ -0,0 +1,173 @@
+"""Filtering of glitched readings before they reach the snapshot.
+
+The controller occasionally reports nonsense, e.g. 999 or -100 for a temperature while its probe is disconnected.
+Every registered key runs through a physical range check, an optional median of its last samples and a slew rate
+check against the last accepted value. A rejected sample is replaced by the last accepted value, so it is neither
+recorded nor seen by automations, and the entity marks it in its attributes. Until a key has an accepted value its
+rejected samples are dropped from the data. The median is one of the reported samples (the lower one of an even
+window) and samples pass unchanged until the window is full. A sample is only replaced by the median, and marked,
+if it deviates from it by more than the spike threshold of the key, the noise of the probe passes unchanged. The
+median mark alone doesn't make the entity write its state, the replaced value does if it changed. The state per key
+is bounded by the median window, a few samples.
+"""
+import logging
+from collections import deque
+from dataclasses import dataclass
+from statistics import median_low
+
+from .const import FILTER_MAX_REJECTED, FILTER_RANGE, FILTER_SLEW, FILTER_MEDIAN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SampleFilter:
+    """Glitch checks of a key, None disables a check"""
+
+    # Physical range, samples outside are always rejected
+    minimum: float | None = None
+    maximum: float | None = None
+    # Largest plausible change per second
+    max_slew: float | None = None
+    # Samples the median is taken of, 1 disables it
+    window: int = 1
+    # Deviation from the median above which a sample is a spike and replaced by the median
+    spike: float = 0.0
+
+
+WATER_TEMP_FILTER = SampleFilter(minimum=-20, maximum=120, max_slew=0.5)
+FLUE_GAS_TEMP_FILTER = SampleFilter(minimum=-20, maximum=500, max_slew=5.0)
+# The outside temperature changes slowly, a median of 3 drops single spikes of more than 2 degrees within the slew
+# rate too
+OUTSIDE_TEMP_FILTER = SampleFilter(minimum=-50, maximum=60, max_slew=0.05, window=3, spike=2.0)
+TEMP_RANGE_FILTER = SampleFilter(minimum=-50, maximum=500)
+
+
+class _KeyState:
+    __slots__ = ("samples", "value", "time", "rejected", "reason", "raw")
+
+    def __init__(self, window: int):
+        self.samples = deque(maxlen=window) if window > 1 else None
+        # Last accepted value and its time
+        self.value = None
+        self.time = None
+        # Consecutive slew rate rejections
+        self.rejected = 0
+        # Reason and raw value of the last sample if it was rejected or replaced by the median
+        self.reason = None
+        self.raw = None
+
+
+class GlitchFilter:
+    """Filters the values of the registered keys"""
+
+    def __init__(self):
+        self._filters: dict[str, SampleFilter] = {}
+        self._states: dict[str, _KeyState] = {}
+        self.filtered = 0
+
+    def register(self, key: str, sample_filter: SampleFilter):
+        self._filters[key] = sample_filter
+        self._states[key] = _KeyState(sample_filter.window)
+
+    def unregister(self, key: str):
+        self._filters.pop(key, None)
+        self._states.pop(key, None)
+
+    def filter(self, now: float, data: dict) -> tuple[dict, set]:
+        """Return data with the rejected samples replaced and the keys which started or stopped being filtered.
+
+        data is not modified, a filtered copy is returned if any sample was replaced or dropped.
+        """
+        replaced = {}
+        dropped = set()
+        toggled = set()
+
+        for key, sample_filter in self._filters.items():
+            if key not in data:
+                continue
+
+            state = self._states[key]
+            value = data[key]
+            reason = state.reason
+            result = self._filter(sample_filter, state, now, value)
+
+            if state.reason is not None:
+                self.filtered += 1
+                _LOGGER.debug("Filtered %s of %s: %s", state.reason, key, value)
+            if result is None and value is not None:
+                # Rejected before any sample was accepted, there is nothing to hold
+                dropped.add(key)
+            elif result is not value:
+                replaced[key] = result
+            if _marked(reason) != _marked(state.reason):
+                toggled.add(key)
+
+        if dropped:
+            data = {key: value for key, value in data.items() if key not in dropped}
+
+        return ({**data, **replaced} if replaced else data), toggled
+
+    def status(self, key: str) -> dict:
+        """State attributes marking a filtered sample of key"""
+        state = self._states.get(key)
+
+        if state is None or state.reason is None:
+            return {}
+
+        return {"filtered": state.reason, "raw_value": state.raw}
+
+    def stats(self) -> dict:
+        return {
+            "filtered": self.filtered,
+            "active": sorted(key for key, state in self._states.items() if state.reason is not None)
+        }
+
+    @staticmethod
+    def _filter(sample_filter: SampleFilter, state: _KeyState, now: float, value):
+        state.reason = None
+        state.raw = None
+
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            return value
+
+        if (sample_filter.minimum is not None and value < sample_filter.minimum) \
+                or (sample_filter.maximum is not None and value > sample_filter.maximum):
+            return _reject(state, FILTER_RANGE, value)
+
+        candidate = value
+
+        if state.samples is not None:
+            state.samples.append(value)
+
+            if len(state.samples) == state.samples.maxlen:
+                median = median_low(state.samples)
+
+                if abs(value - median) > sample_filter.spike:
+                    candidate = median
+                    state.reason = FILTER_MEDIAN
+                    state.raw = value
+
+        # A step persisting over FILTER_MAX_REJECTED samples is real, e.g. the boiler was restarted
+        if sample_filter.max_slew is not None and state.value is not None and state.rejected < FILTER_MAX_REJECTED \
+                and abs(candidate - state.value) > sample_filter.max_slew * (now - state.time):
+            state.rejected += 1
+            return _reject(state, FILTER_SLEW, value)
+
+        state.value = candidate
+        state.time = now
+        state.rejected = 0
+
+        return candidate
+
+
+def _marked(reason: str | None) -> bool:
+    """Whether the entity has to write its state for the mark of reason, the median mark rides on value changes"""
+    return reason is not None and reason != FILTER_MEDIAN
+
+
+def _reject(state: _KeyState, reason: str, value):
+    state.reason = reason
+    state.raw = value
+
+    return state.value
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .common import EconetDataCoordinator
+from .const import DOMAIN, SERVICE_HUB, HUB_MAX_CONCURRENCY, HUB_TICK_INTERVAL, POLL_INTERVAL_BASE
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _Controller:
+    __slots__ = ("coordinator", "next_poll", "polling", "failed", "changed", "polls", "last_latency",
+                 "avg_latency", "max_latency")
+
+    def __init__(self, coordinator: EconetDataCoordinator, next_poll: float):
+        self.coordinator = coordinator
+        self.next_poll = next_poll
+        self.polling = False
+        self.failed = False
+        self.changed = False
+        self.polls = 0
+        self.last_latency = None
+        self.avg_latency = None
+        self.max_latency = None
+
+    def priority(self):
+        """Sort key, controllers that recently failed or changed are polled first"""
+        return not self.failed, not self.changed, self.next_poll
+
+    def record_latency(self, latency: float):
+        self.polls += 1
+        self.last_latency = latency
+        self.avg_latency = latency if self.avg_latency is None else self.avg_latency * 0.8 + latency * 0.2
+        self.max_latency = latency if self.max_latency is None else max(self.max_latency, latency)
+
+    def diagnostics(self) -> dict:
+        return {
+            "polls": self.polls,
+            "failed": self.failed,
+            "changed": self.changed,
+            "next_poll_in": max(0.0, self.next_poll - time.monotonic()),
+            "last_latency": self.last_latency,
+            "avg_latency": self.avg_latency,
+            "max_latency": self.max_latency
+        }
+
+
+class EconetHub:
+    """Polls the coordinators of all ecoNET300 entries from a single scheduler.
+
+    Polls are staggered across the poll interval and limited to a global concurrency, every coordinator still
+    picks its own (adaptive) interval.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_concurrency: int = HUB_MAX_CONCURRENCY):
+        self._hass = hass
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._controllers: dict[str, _Controller] = {}
+        self._remove_timer = None
+
+    def __len__(self):
+        return len(self._controllers)
+
+    @callback
+    def async_register(self, entry_id: str, coordinator: EconetDataCoordinator) -> Callable[[], None]:
+        """Start polling coordinator, returns a callable stopping it"""
+        next_poll = time.monotonic() + coordinator.poll_interval().total_seconds()
+        self._controllers[entry_id] = _Controller(coordinator, next_poll)
+        self._controllers[entry_id].next_poll = self._stagger(entry_id, next_poll)
+
+        if self._remove_timer is None:
+            self._remove_timer = async_track_time_interval(self._hass, self._async_tick,
+                                                           timedelta(seconds=HUB_TICK_INTERVAL))
+
+        @callback
+        def remove():
+            self._controllers.pop(entry_id, None)
+
+            if not self._controllers and self._remove_timer is not None:
+                self._remove_timer()
+                self._remove_timer = None
+
+        return remove
+
+    def diagnostics(self) -> dict:
+        return {entry_id: controller.diagnostics() for entry_id, controller in self._controllers.items()}
+
+    @callback
+    def _async_tick(self, _now=None):
+        now = time.monotonic()
+        due = [(entry_id, controller) for entry_id, controller in self._controllers.items()
+               if not controller.polling and controller.next_poll <= now]
+
+        # The semaphore wakes waiters in FIFO order, so the order of the tasks is the order of the polls
+        for entry_id, controller in sorted(due, key=lambda item: item[1].priority()):
+            if not controller.coordinator.has_subscribers():
+                controller.next_poll = now + controller.coordinator.poll_interval().total_seconds()
+                continue
+
+            controller.polling = True
+            self._hass.async_create_task(self._async_poll(entry_id, controller))
+
+    async def _async_poll(self, entry_id: str, controller: _Controller):
+        coordinator = controller.coordinator
+
+        try:
+            async with self._semaphore:
+                started = time.monotonic()
+                await coordinator.async_refresh()
+                controller.record_latency(time.monotonic() - started)
+        finally:
+            controller.polling = False
+
+        controller.failed = not coordinator.last_update_success
+        changed_keys = coordinator.changed_keys()
+        controller.changed = changed_keys is None or bool(changed_keys)
+
+        _LOGGER.debug("Polled %s in %.3fs", entry_id, controller.last_latency)
+
+        controller.next_poll = self._stagger(entry_id,
+                                             time.monotonic() + coordinator.poll_interval().total_seconds())
+
+    def _stagger(self, entry_id: str, next_poll: float) -> float:
+        """Move next_poll so that it is at least a slot away from the polls of the other controllers"""
+        if len(self._controllers) < 2:
+            return next_poll
+
+        slot = POLL_INTERVAL_BASE / len(self._controllers)
+        others = sorted(c.next_poll for key, c in self._controllers.items() if key != entry_id)
+
+        for other in others:
+            if abs(other - next_poll) < slot:
+                next_poll = other + slot
+
+        return next_poll
+
+
+@callback
+def async_get_hub(hass: HomeAssistant) -> EconetHub:
+    hub = hass.data[DOMAIN].get(SERVICE_HUB)
+
+    if hub is None:
+        hub = hass.data[DOMAIN][SERVICE_HUB] = EconetHub(hass)
+
+    return hub
@@ -0,0 +1,31 @@
+"""JSON decoding of controller responses.
+
+Uses orjson when it is installed and falls back to the standard library otherwise. Both decode straight from the
+response bytes, the whole document, and keep the requested top-level sections of it.
+"""
+import json
+import logging
+from typing import Any, Iterable
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+_LOGGER = logging.getLogger(__name__)
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def decode(raw: bytes, sections: Iterable[str] | None = None) -> Any:
+    """Decode raw, keeping only the given top-level sections of an object document if sections are given"""
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+    return data if sections is None else _select(data, sections)
+
+
+def _select(data, sections: Iterable[str]):
+    if not isinstance(data, dict):
+        return data
+
+    return {key: data[key] for key in sections if key in data}
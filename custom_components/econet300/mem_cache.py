@@ -1,13 +1,22 @@
+import asyncio
 import logging
 import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from .const import MEM_CACHE_MAX_SIZE, MEM_CACHE_DEFAULT_DURATION
 
 _LOGGER = logging.getLogger(__name__)
 
+
 class MemCacheItem:
-    def __init__(self, key, value, duration: int):
+    __slots__ = ("_key", "_value", "_expiry", "_stale_until")
+
+    def __init__(self, key, value, expiry: float, stale_until: float):
         self._key = key
         self._value = value
-        self._expiry = time.time() + duration
+        self._expiry = expiry
+        self._stale_until = stale_until
 
     def value(self):
         return self._value
@@ -15,25 +24,148 @@ class MemCacheItem:
     def expiry(self):
         return self._expiry
 
+    def expired(self, now: float) -> bool:
+        return self._expiry <= now
+
+    def dead(self, now: float) -> bool:
+        """Expired and past the window in which it may still be served stale"""
+        return self._stale_until <= now
+
     def __repr__(self):
         return '<MemCacheItem {%s:%s} expires at: %s, expired: %s>' % (self._key, self._value, self.expiry(),
-                                                                       self.expiry() < time.time())
+                                                                       self.expired(time.monotonic()))
 
 
 class MemCache:
-    def __init__(self):
-        self._data = dict()
+    """Bounded LRU cache with monotonic-clock expiry.
+
+    Entries set with a stale_duration may be served by get_or_load for that long after they expired while
+    they are reloaded in the background (stale-while-revalidate).
+    """
+
+    def __init__(self, max_size: int = MEM_CACHE_MAX_SIZE, clock: Callable[[], float] = time.monotonic):
+        self._data: OrderedDict[Any, MemCacheItem] = OrderedDict()
+        self._loading: dict[Any, asyncio.Future] = {}
+        self._max_size = max_size
+        self._clock = clock
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
 
     def exists(self, key):
-        return self.get(key) is not None
+        item = self._lookup(key)
+
+        return item is not None and not item.expired(self._clock())
 
     def get(self, key):
-        if key not in self._data or self._data[key].expiry() < time.time():
-            _LOGGER.debug("Cache entry missing for key: '{}'".format(key))
+        item = self._lookup(key)
+
+        if item is None or item.expired(self._clock()):
+            _LOGGER.debug("Cache entry missing for key: '%s'", key)
+            self.misses += 1
             return None
 
-        return self._data[key].value()
+        self.hits += 1
+        return item.value()
+
+    def set(self, key, value, duration: float = MEM_CACHE_DEFAULT_DURATION, stale_duration: float = 0):
+        _LOGGER.debug("Caching value for: '%s'", key)
+        expiry = self._clock() + duration
+        self._data[key] = MemCacheItem(key, value, expiry, expiry + stale_duration)
+        self._data.move_to_end(key)
+
+        if len(self._data) > self._max_size:
+            self.purge()
+
+        while len(self._data) > self._max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(self, key, loader: Callable[[], Awaitable[Any]],
+                          duration: float = MEM_CACHE_DEFAULT_DURATION, stale_duration: float = 0):
+        """Return the cached value or load and cache it, concurrent callers share a single load.
+
+        A stale value is returned immediately while a background load refreshes it.
+        """
+        item = self._lookup(key)
+
+        if item is not None:
+            if not item.expired(self._clock()):
+                self.hits += 1
+                return item.value()
+
+            _LOGGER.debug("Serving stale cache entry for key: '%s'", key)
+            self.stale_hits += 1
+            self._start_load(key, loader, duration, stale_duration)
+            return item.value()
+
+        self.misses += 1
+
+        return await asyncio.shield(self._start_load(key, loader, duration, stale_duration))
+
+    def prefetch(self, key, loader: Callable[[], Awaitable[Any]], duration: float = MEM_CACHE_DEFAULT_DURATION,
+                 stale_duration: float = 0) -> asyncio.Future:
+        """Start loading key in the background unless a load is already running, returns the load"""
+        return self._start_load(key, loader, duration, stale_duration)
+
+    def purge(self):
+        """Drop all expired entries"""
+        now = self._clock()
+
+        for key in [key for key, item in self._data.items() if item.dead(now)]:
+            del self._data[key]
+            self.expirations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+
+        return {
+            "size": len(self._data),
+            "max_size": self._max_size,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+    def _start_load(self, key, loader, duration, stale_duration) -> asyncio.Future:
+        load = self._loading.get(key)
+
+        if load is None:
+            _LOGGER.debug("Loading cache entry for key: '%s'", key)
+            load = asyncio.ensure_future(self._load(key, loader, duration, stale_duration))
+            self._loading[key] = load
+            load.add_done_callback(lambda l: self._on_loaded(key, l))
+
+        return load
+
+    async def _load(self, key, loader, duration, stale_duration):
+        value = await loader()
+        self.set(key, value, duration, stale_duration)
+
+        return value
+
+    def _on_loaded(self, key, load: asyncio.Future):
+        self._loading.pop(key, None)
+
+        # Retrieve the error, nobody may be awaiting a background load
+        if not load.cancelled() and load.exception() is not None:
+            _LOGGER.debug("Loading cache entry for key: '%s' failed: %r", key, load.exception())
+
+    def _lookup(self, key) -> MemCacheItem | None:
+        item = self._data.get(key)
+
+        if item is None:
+            return None
+
+        if item.dead(self._clock()):
+            del self._data[key]
+            self.expirations += 1
+            return None
 
-    def set(self, key, value, duration: int = 60):
-        _LOGGER.debug("Caching value for: '{}'".format(key))
-        self._data[key] = MemCacheItem(key, value, duration)
+        self._data.move_to_end(key)
+        return item
@@ -0,0 +1,101 @@
+"""Timings and counts of the hot paths of a controller, for diagnostics and the debug sensors.
+
+Collection is off unless something enables it, callers check `enabled` before taking any timestamp, so a disabled
+Metrics costs one attribute lookup per measured call.
+"""
+import logging
+from bisect import bisect_left
+from typing import Callable
+
+from .const import METRICS_LATENCY_BUCKETS, METRICS_COUNT_BUCKETS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Counts of observations per bucket, bounds are the inclusive upper limits of the buckets"""
+
+    __slots__ = ("bounds", "buckets", "count", "sum", "max")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        # The last bucket takes everything above the last bound
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+        if value > self.max:
+            self.max = value
+
+    def mean(self) -> float | None:
+        return self.sum / self.count if self.count else None
+
+    def diagnostics(self) -> dict:
+        labels = ["<={}".format(bound) for bound in self.bounds] + [">{}".format(self.bounds[-1])]
+
+        return {
+            "count": self.count,
+            "mean": self.mean(),
+            "max": self.max,
+            "buckets": dict(zip(labels, self.buckets))
+        }
+
+
+class Metrics:
+    """Latency histograms (ms) per name, e.g. per endpoint, and histograms of counts per refresh"""
+
+    def __init__(self):
+        self.enabled = False
+        self._users = 0
+        self._latencies: dict[str, Histogram] = {}
+        self._counts: dict[str, Histogram] = {}
+
+    def enable(self) -> Callable[[], None]:
+        """Start collecting, returns a callable stopping it once every user has called it"""
+        self._users += 1
+        self.enabled = True
+
+        def disable():
+            self._users -= 1
+            self.enabled = self._users > 0
+
+        return disable
+
+    def observe_latency(self, name: str, seconds: float):
+        histogram = self._latencies.get(name)
+
+        if histogram is None:
+            histogram = self._latencies[name] = Histogram(METRICS_LATENCY_BUCKETS)
+
+        histogram.observe(seconds * 1000)
+
+    def observe_count(self, name: str, count: int):
+        histogram = self._counts.get(name)
+
+        if histogram is None:
+            histogram = self._counts[name] = Histogram(METRICS_COUNT_BUCKETS)
+
+        histogram.observe(count)
+
+    def mean_latency(self, name: str) -> float | None:
+        histogram = self._latencies.get(name)
+
+        return None if histogram is None else histogram.mean()
+
+    def mean_count(self, name: str) -> float | None:
+        histogram = self._counts.get(name)
+
+        return None if histogram is None else histogram.mean()
+
+    def diagnostics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "latency_ms": {name: histogram.diagnostics() for name, histogram in self._latencies.items()},
+            "counts": {name: histogram.diagnostics() for name, histogram in self._counts.items()}
+        }
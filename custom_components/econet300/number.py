@@ -0,0 +1,133 @@
+import logging
+from dataclasses import dataclass
+
+from homeassistant.components.number import NumberEntityDescription, NumberEntity, NumberMode
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import TEMP_CELSIUS
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .api import map_param, ApiError, DataError
+from .common import EconetDataCoordinator, Econet300Api
+from .const import DOMAIN, SERVICE_COORDINATOR, SERVICE_API
+from .entity import EconetEntity
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class EconetNumberEntityDescription(NumberEntityDescription):
+    """Describes Econet number entity."""
+
+    # Sub device of the entity, e.g. mixer-1, None for the controller
+    device: str | None = None
+
+
+NUMBER_TYPES: tuple[EconetNumberEntityDescription, ...] = (
+    EconetNumberEntityDescription(
+        key="tempCOSet",
+        name="Fireplace set temperature",
+        icon="mdi:thermometer",
+        native_unit_of_measurement=TEMP_CELSIUS,
+        native_min_value=27,
+        native_max_value=68,
+        native_step=1,
+        mode=NumberMode.BOX
+    ),
+    EconetNumberEntityDescription(
+        key="tempCWUSet",
+        name="Water set temperature",
+        icon="mdi:thermometer",
+        native_unit_of_measurement=TEMP_CELSIUS,
+        native_min_value=20,
+        native_max_value=55,
+        native_step=1,
+        mode=NumberMode.BOX
+    ),
+)
+
+
+class EconetNumber(NumberEntity):
+    """Describe Econet Number"""
+
+    def _sync_state(self, value):
+        """Sync state"""
+        self._attr_native_value = value
+        self.async_write_ha_state()
+
+
+class ControllerNumber(EconetEntity, EconetNumber):
+    """Editable param of the controller, the limits come from the cached param limits.
+
+    Until they are fetched, in the background so that the setup doesn't wait for the controller, the static limits
+    of the description apply.
+    """
+
+    def __init__(self, description: EconetNumberEntityDescription, coordinator: EconetDataCoordinator,
+                 api: Econet300Api):
+        super().__init__(description, coordinator, api)
+
+    async def async_added_to_hass(self):
+        """Handle added to hass."""
+        await super().async_added_to_hass()
+
+        task = self.hass.async_create_task(self._async_update_limits())
+        self.async_on_remove(task.cancel)
+
+    async def async_set_native_value(self, value: float) -> None:
+        """Write the value, the coordinator patches it into the snapshot and updates the state once the controller
+        accepted it"""
+        if value.is_integer():
+            value = int(value)
+
+        if not await self._api.set_param(self.entity_description.key, value):
+            _LOGGER.warning("Setting value: %s of: '%s' failed", value, self.entity_description.key)
+            return
+
+        await self._async_update_limits()
+
+    async def _async_update_limits(self):
+        try:
+            limits = await self._api.get_param_limits(self.entity_description.key)
+        except (ApiError, DataError) as error:
+            _LOGGER.warning("Could not fetch limits of: '%s': %r", self.entity_description.key, error)
+            return
+
+        if limits is None:
+            return
+
+        if (limits.min, limits.max) == (self.native_min_value, self.native_max_value):
+            return
+
+        self._attr_native_min_value = limits.min
+        self._attr_native_max_value = limits.max
+        self.async_write_ha_state()
+
+
+def can_add(desc: EconetNumberEntityDescription, coordinator: EconetDataCoordinator):
+    return map_param(desc.key) is not None and coordinator.fetched_value(desc.key) is not None
+
+
+def create_controller_numbers(coordinator: EconetDataCoordinator, api: Econet300Api):
+    entities = []
+
+    for description in NUMBER_TYPES:
+        if can_add(description, coordinator):
+            entities.append(ControllerNumber(description, coordinator, api))
+        else:
+            _LOGGER.debug("Availability key: %s does not exist, entity will not be added", description.key)
+
+    return entities
+
+
+async def async_setup_entry(
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        async_add_entities: AddEntitiesCallback,
+) -> bool:
+    """Set up the number platform."""
+
+    coordinator = hass.data[DOMAIN][entry.entry_id][SERVICE_COORDINATOR]
+    api = hass.data[DOMAIN][entry.entry_id][SERVICE_API]
+
+    return async_add_entities(create_controller_numbers(coordinator, api))
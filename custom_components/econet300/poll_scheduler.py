@@ -0,0 +1,80 @@
+import logging
+import time
+from datetime import timedelta
+
+from .const import POLL_INTERVAL_MIN, POLL_INTERVAL_BASE, POLL_INTERVAL_MAX, POLL_BACKOFF_FACTOR, \
+    POLL_FLUE_GAS_SLOPE, API_REG_PARAMS_PARAM_MODE, API_REG_PARAMS_PARAM_LIGHTER_WORKS, \
+    API_REG_PARAMS_PARAM_TEMP_FLUE_GAS
+
+_LOGGER = logging.getLogger(__name__)
+
+# Keys the scheduler looks at, they have to be fetched even if no entity uses them
+SCHEDULER_KEYS = (API_REG_PARAMS_PARAM_MODE, API_REG_PARAMS_PARAM_LIGHTER_WORKS, API_REG_PARAMS_PARAM_TEMP_FLUE_GAS)
+
+
+class AdaptivePollScheduler:
+    """Picks the next poll interval based on what the controller is doing.
+
+    Transient states (mode change, lighter working, fast flue gas slope) are polled at the minimum interval,
+    a snapshot without any change or a failed poll backs the interval off exponentially up to the ceiling.
+    """
+
+    def __init__(self, min_interval: float = POLL_INTERVAL_MIN, base_interval: float = POLL_INTERVAL_BASE,
+                 max_interval: float = POLL_INTERVAL_MAX, backoff_factor: float = POLL_BACKOFF_FACTOR,
+                 flue_gas_slope: float = POLL_FLUE_GAS_SLOPE):
+        self._min = min_interval
+        self._base = max(base_interval, min_interval)
+        self._max = max(max_interval, self._base)
+        self._factor = backoff_factor
+        self._flue_gas_slope = flue_gas_slope
+
+        self._interval = self._base
+        self._prev_mode = None
+        self._prev_flue_gas = None
+        self._prev_time = None
+
+    def interval(self) -> timedelta:
+        return timedelta(seconds=self._interval)
+
+    def on_success(self, data: dict, changed_keys: set | None, now: float | None = None) -> timedelta:
+        """Compute the next interval after a successful poll"""
+        now = time.monotonic() if now is None else now
+
+        if self._is_transient(data, now):
+            self._interval = self._min
+        elif changed_keys is None or changed_keys or self._interval < self._base:
+            self._interval = self._base
+        else:
+            self._interval = min(self._interval * self._factor, self._max)
+
+        self._prev_mode = data.get(API_REG_PARAMS_PARAM_MODE)
+        self._prev_flue_gas = data.get(API_REG_PARAMS_PARAM_TEMP_FLUE_GAS)
+        self._prev_time = now
+
+        _LOGGER.debug("Next poll in %ss", self._interval)
+
+        return self.interval()
+
+    def on_failure(self) -> timedelta:
+        """Compute the next interval after a failed poll"""
+        self._interval = min(max(self._interval, self._base) * self._factor, self._max)
+
+        _LOGGER.debug("Poll failed, next poll in %ss", self._interval)
+
+        return self.interval()
+
+    def _is_transient(self, data: dict, now: float) -> bool:
+        if data.get(API_REG_PARAMS_PARAM_LIGHTER_WORKS):
+            return True
+
+        mode = data.get(API_REG_PARAMS_PARAM_MODE)
+        if self._prev_mode is not None and mode != self._prev_mode:
+            return True
+
+        flue_gas = data.get(API_REG_PARAMS_PARAM_TEMP_FLUE_GAS)
+        if flue_gas is None or self._prev_flue_gas is None or now <= self._prev_time:
+            return False
+
+        slope = (flue_gas - self._prev_flue_gas) * 60 / (now - self._prev_time)
+
+        return abs(slope) >= self._flue_gas_slope
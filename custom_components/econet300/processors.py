@@ -0,0 +1,105 @@
+"""Value processors shared by the entity descriptions and their application in the coordinator.
+
+A ValueProcessor describes the scaling, sanity clamping and rounding of a numeric value. Processors are created once
+per configuration and shared, instead of a lambda per description. After every refresh the coordinator processes
+the registered keys whose value changed, so a refresh costs no more than the entities writing their state, and the
+entities get the processed values from the coordinator.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def identity(value):
+    return value
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+@dataclass(frozen=True)
+class ValueProcessor:
+    """Scales, clamps and rounds a numeric value, in this order. Other values pass unchanged."""
+
+    digits: int | None = None
+    scale: float | None = None
+    minimum: float | None = None
+    maximum: float | None = None
+
+    def __call__(self, value):
+        if not _is_number(value):
+            return value
+
+        if self.scale is not None:
+            value = value * self.scale
+        if self.minimum is not None and value < self.minimum:
+            value = self.minimum
+        if self.maximum is not None and value > self.maximum:
+            value = self.maximum
+
+        return value if self.digits is None else round(value, self.digits)
+
+
+_rounders: dict[int, ValueProcessor] = {}
+
+
+def rounder(digits: int | None) -> Callable[[Any], Any]:
+    """Processor rounding to digits, identity for None"""
+    if digits is None:
+        return identity
+
+    processor = _rounders.get(digits)
+
+    if processor is None:
+        processor = _rounders[digits] = ValueProcessor(digits=digits)
+
+    return processor
+
+
+ROUND_1 = rounder(1)
+ROUND_2 = rounder(2)
+PERCENT_1 = ValueProcessor(digits=1, minimum=0.0, maximum=100.0)
+PERCENT_2 = ValueProcessor(digits=2, minimum=0.0, maximum=100.0)
+
+
+class BatchProcessor:
+    """Applies the processors registered per key to the changed values of a snapshot"""
+
+    def __init__(self):
+        self._processors: dict[str, Callable[[Any], Any]] = {}
+        self._values: dict[str, Any] = {}
+
+    def register(self, key: str, processor: Callable[[Any], Any], data: dict | None = None):
+        """Process the values of key with processor, starting with the current value in data"""
+        self._processors[key] = processor
+
+        if data is not None and key in data:
+            self._values[key] = processor(data[key])
+
+    def unregister(self, key: str):
+        self._processors.pop(key, None)
+        self._values.pop(key, None)
+
+    def value(self, key: str, data: dict):
+        """Processed value of key, the value in data if no processor is registered for it"""
+        if key in self._processors:
+            return self._values.get(key)
+
+        return data.get(key)
+
+    def process(self, data: dict, keys: Iterable[str]):
+        """Process the registered ones of keys, e.g. the changed keys, with their values in data"""
+        for key in keys:
+            processor = self._processors.get(key)
+
+            if processor is None:
+                continue
+
+            if key in data:
+                self._values[key] = processor(data[key])
+            else:
+                # Removed from the snapshot
+                self._values.pop(key, None)
@@ -0,0 +1,104 @@
+import logging
+import random
+import time
+
+from .const import API_RETRY_MAX_ATTEMPTS, API_RETRY_BASE_DELAY, API_RETRY_MAX_DELAY, API_RETRY_DEADLINE, \
+    API_RETRY_JITTER, API_CIRCUIT_FAILURE_THRESHOLD, API_CIRCUIT_COOLDOWN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RetryPolicy:
+    """Bounded retries with exponential, jittered backoff and a total deadline"""
+
+    def __init__(self, max_attempts: int = API_RETRY_MAX_ATTEMPTS, base_delay: float = API_RETRY_BASE_DELAY,
+                 max_delay: float = API_RETRY_MAX_DELAY, deadline: float = API_RETRY_DEADLINE,
+                 jitter: float = API_RETRY_JITTER):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.jitter = jitter
+
+    def delay(self, attempt: int) -> float:
+        """Return the sleep before the attempt following the given (1-based) one"""
+        delay = min(self.base_delay * 2 ** (attempt - 1), self.max_delay)
+
+        return random.uniform(delay * (1 - self.jitter), delay)
+
+
+class CircuitBreaker:
+    """Fails fast after consecutive failures, then lets a single probe through after a cooldown"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = API_CIRCUIT_FAILURE_THRESHOLD,
+                 cooldown: float = API_CIRCUIT_COOLDOWN, clock=time.monotonic):
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._clock = clock
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._times_opened = 0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow_request(self) -> bool:
+        if self._state == self.OPEN:
+            if self._clock() - self._opened_at < self._cooldown:
+                return False
+
+            _LOGGER.debug("Circuit half-open, probing controller")
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+        if self._state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+
+            self._probe_in_flight = True
+
+        return True
+
+    def release_probe(self):
+        """End a request allowed by allow_request which neither succeeded nor failed, e.g. it was cancelled"""
+        if self._probe_in_flight:
+            _LOGGER.debug("Probe ended without a result, the next request probes again")
+
+        self._probe_in_flight = False
+
+    def record_success(self):
+        if self._state != self.CLOSED:
+            _LOGGER.info("Circuit closed, controller is reachable again")
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+
+        if self._state == self.HALF_OPEN or self._failures >= self._failure_threshold:
+            if self._state != self.OPEN:
+                _LOGGER.warning("Circuit opened after %s consecutive failures", self._failures)
+                self._times_opened += 1
+
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+            self._probe_in_flight = False
+
+    def diagnostics(self) -> dict:
+        return {
+            "state": self._state,
+            "consecutive_failures": self._failures,
+            "times_opened": self._times_opened,
+            "cooldown_remaining": max(0.0, self._cooldown - (self._clock() - self._opened_at))
+            if self._state == self.OPEN else 0.0
+        }
@@ -1,19 +1,26 @@
-from abc import ABC
+import logging
 from dataclasses import dataclass
-from typing import Callable, Any
+from functools import partial
+from typing import Callable, Any, TYPE_CHECKING
 
-from .common import EconetDataCoordinator, Econet300Api
 from homeassistant.components.sensor import SensorEntityDescription, SensorStateClass, SensorDeviceClass, SensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import TEMP_CELSIUS, PERCENTAGE
+from homeassistant.const import TEMP_CELSIUS, PERCENTAGE, TIME_HOURS, TIME_MILLISECONDS, TIME_SECONDS, Platform
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from .const import DOMAIN, SERVICE_COORDINATOR, SERVICE_API
 
-import logging
+from .common import EconetDataCoordinator, Econet300Api
+from .const import DOMAIN, SERVICE_COORDINATOR, SERVICE_API, SERVICE_DISCOVERY, DERIVED_FUEL_BURN_RATE, \
+    DERIVED_FUEL_TIME_TO_EMPTY, DERIVED_BOILER_OUTPUT_HOURS, API_REG_PARAMS_PARAM_FUEL_LEVEL, \
+    API_REG_PARAMS_PARAM_BOILER_POWER, API_REG_PARAMS_URI, METRICS_REFRESH, METRICS_DECODE, METRICS_ENTITY_WRITES
+from .entity import EconetEntity, device_info
+from .filters import SampleFilter, WATER_TEMP_FILTER, FLUE_GAS_TEMP_FILTER, OUTSIDE_TEMP_FILTER
+from .processors import identity, rounder, ROUND_2, PERCENT_1, PERCENT_2
+from .timeseries import ATTRIBUTE_NAMES
 
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from .entity import EconetEntity
+if TYPE_CHECKING:
+    from .discovery import DiscoveredKey
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -22,7 +29,15 @@ _LOGGER = logging.getLogger(__name__)
 class EconetSensorEntityDescription(SensorEntityDescription):
     """Describes Econet sensor entity."""
 
-    process_val: Callable[[Any], Any] = lambda x: x
+    process_val: Callable[[Any], Any] = identity
+    tolerance: float = 0
+    track_statistics: bool = False
+    # Key of the fetched value a derived value is computed from, None for fetched values
+    source_key: str | None = None
+    # Sub device of the entity, e.g. mixer-1, None for the controller
+    device: str | None = None
+    # Glitch checks of the fetched values, None passes them unchanged
+    sample_filter: SampleFilter | None = None
 
 
 SENSOR_TYPES: tuple[EconetSensorEntityDescription, ...] = (
@@ -32,8 +47,11 @@ SENSOR_TYPES: tuple[EconetSensorEntityDescription, ...] = (
         icon="mdi:thermometer",
         native_unit_of_measurement=TEMP_CELSIUS,
         state_class=SensorStateClass.MEASUREMENT,
+        track_statistics=True,
         device_class=SensorDeviceClass.TEMPERATURE,
-        process_val=lambda x: round(x, 2)
+        process_val=ROUND_2,
+        tolerance=0.1,
+        sample_filter=WATER_TEMP_FILTER
     ),
     EconetSensorEntityDescription(
         key="fanPower",
@@ -41,8 +59,9 @@ SENSOR_TYPES: tuple[EconetSensorEntityDescription, ...] = (
         icon="mdi:fan",
         native_unit_of_measurement=PERCENTAGE,
         state_class=SensorStateClass.MEASUREMENT,
+        track_statistics=True,
         device_class=SensorDeviceClass.SPEED,
-        process_val=lambda x: round(x, 2)
+        process_val=PERCENT_2
     ),
     EconetSensorEntityDescription(
         key="tempFlueGas",
@@ -50,8 +69,11 @@ SENSOR_TYPES: tuple[EconetSensorEntityDescription, ...] = (
         icon="mdi:thermometer",
         native_unit_of_measurement=TEMP_CELSIUS,
         state_class=SensorStateClass.MEASUREMENT,
+        track_statistics=True,
         device_class=SensorDeviceClass.TEMPERATURE,
-        process_val=lambda x: round(x, 2)
+        process_val=ROUND_2,
+        tolerance=0.1,
+        sample_filter=FLUE_GAS_TEMP_FILTER
     ),
     EconetSensorEntityDescription(
         key="tempCO",
@@ -59,8 +81,11 @@ SENSOR_TYPES: tuple[EconetSensorEntityDescription, ...] = (
         icon="mdi:thermometer",
         native_unit_of_measurement=TEMP_CELSIUS,
         state_class=SensorStateClass.MEASUREMENT,
+        track_statistics=True,
         device_class=SensorDeviceClass.TEMPERATURE,
-        process_val=lambda x: round(x, 2)
+        process_val=ROUND_2,
+        tolerance=0.1,
+        sample_filter=WATER_TEMP_FILTER
     ),
     EconetSensorEntityDescription(
         key="tempBack",
@@ -68,8 +93,11 @@ SENSOR_TYPES: tuple[EconetSensorEntityDescription, ...] = (
         icon="mdi:thermometer",
         native_unit_of_measurement=TEMP_CELSIUS,
         state_class=SensorStateClass.MEASUREMENT,
+        track_statistics=True,
         device_class=SensorDeviceClass.TEMPERATURE,
-        process_val=lambda x: round(x, 2)
+        process_val=ROUND_2,
+        tolerance=0.1,
+        sample_filter=WATER_TEMP_FILTER
     ),
     EconetSensorEntityDescription(
         key="tempCWU",
@@ -77,8 +105,11 @@ SENSOR_TYPES: tuple[EconetSensorEntityDescription, ...] = (
         icon="mdi:thermometer",
         native_unit_of_measurement=TEMP_CELSIUS,
         state_class=SensorStateClass.MEASUREMENT,
+        track_statistics=True,
         device_class=SensorDeviceClass.TEMPERATURE,
-        process_val=lambda x: round(x, 2)
+        process_val=ROUND_2,
+        tolerance=0.1,
+        sample_filter=WATER_TEMP_FILTER
     ),
     EconetSensorEntityDescription(
         key="tempExternalSensor",
@@ -86,8 +117,11 @@ SENSOR_TYPES: tuple[EconetSensorEntityDescription, ...] = (
         icon="mdi:thermometer",
         native_unit_of_measurement=TEMP_CELSIUS,
         state_class=SensorStateClass.MEASUREMENT,
+        track_statistics=True,
         device_class=SensorDeviceClass.TEMPERATURE,
-        process_val=lambda x: round(x, 2)
+        process_val=ROUND_2,
+        tolerance=0.1,
+        sample_filter=OUTSIDE_TEMP_FILTER
     ),
     EconetSensorEntityDescription(
         key="boilerPower",
@@ -95,7 +129,8 @@ SENSOR_TYPES: tuple[EconetSensorEntityDescription, ...] = (
         icon="mdi:gauge",
         native_unit_of_measurement=PERCENTAGE,
         state_class=SensorStateClass.MEASUREMENT,
-        process_val=lambda x: round(x, 2)
+        track_statistics=True,
+        process_val=PERCENT_2
     ),
     EconetSensorEntityDescription(
         key="fuelLevel",
@@ -103,26 +138,145 @@ SENSOR_TYPES: tuple[EconetSensorEntityDescription, ...] = (
         icon="mdi:gas-station",
         native_unit_of_measurement=PERCENTAGE,
         state_class=SensorStateClass.MEASUREMENT,
-        process_val=lambda x: round(x, 1)
+        track_statistics=True,
+        process_val=PERCENT_1
     ),
     EconetSensorEntityDescription(
         key="mode",
         name="Operation mode",
         icon="mdi:sync",
+        state_class=SensorStateClass.MEASUREMENT
+    ),
+    EconetSensorEntityDescription(
+        key=DERIVED_FUEL_BURN_RATE,
+        name="Fuel burn rate",
+        icon="mdi:fire",
+        native_unit_of_measurement="%/h",
+        state_class=SensorStateClass.MEASUREMENT,
+        source_key=API_REG_PARAMS_PARAM_FUEL_LEVEL
+    ),
+    EconetSensorEntityDescription(
+        key=DERIVED_FUEL_TIME_TO_EMPTY,
+        name="Fuel time to empty",
+        icon="mdi:timer-sand",
+        native_unit_of_measurement=TIME_HOURS,
         state_class=SensorStateClass.MEASUREMENT,
-        process_val=lambda x: x
+        device_class=SensorDeviceClass.DURATION,
+        source_key=API_REG_PARAMS_PARAM_FUEL_LEVEL,
+        tolerance=0.1
+    ),
+    EconetSensorEntityDescription(
+        key=DERIVED_BOILER_OUTPUT_HOURS,
+        name="Boiler output full power hours",
+        icon="mdi:counter",
+        native_unit_of_measurement=TIME_HOURS,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        source_key=API_REG_PARAMS_PARAM_BOILER_POWER,
+        process_val=ROUND_2,
+        tolerance=0.01
     )
 )
 
 
+@dataclass
+class EconetDebugSensorEntityDescription(SensorEntityDescription):
+    """Describes Econet debug sensor entity, the value is read after every refresh."""
+
+    value_fn: Callable[[Econet300Api, EconetDataCoordinator], Any] = lambda api, coordinator: None
+    entity_registry_enabled_default: bool = False
+    entity_category: EntityCategory | None = EntityCategory.DIAGNOSTIC
+
+
+def _round(value: float | None, digits: int = 1) -> float | None:
+    return None if value is None else round(value, digits)
+
+
+def _percent(ratio: float | None) -> float | None:
+    return None if ratio is None else round(ratio * 100, 1)
+
+
+DEBUG_SENSOR_TYPES: tuple[EconetDebugSensorEntityDescription, ...] = (
+    EconetDebugSensorEntityDescription(
+        key="refreshDuration",
+        name="Refresh duration",
+        icon="mdi:timer-outline",
+        native_unit_of_measurement=TIME_MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda api, coordinator: _round(api.metrics().mean_latency(METRICS_REFRESH))
+    ),
+    EconetDebugSensorEntityDescription(
+        key="regParamsLatency",
+        name="Reg params latency",
+        icon="mdi:timer-outline",
+        native_unit_of_measurement=TIME_MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda api, coordinator: _round(api.metrics().mean_latency(API_REG_PARAMS_URI))
+    ),
+    EconetDebugSensorEntityDescription(
+        key="decodeDuration",
+        name="JSON decode duration",
+        icon="mdi:timer-outline",
+        native_unit_of_measurement=TIME_MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda api, coordinator: _round(api.metrics().mean_latency(METRICS_DECODE), 3)
+    ),
+    EconetDebugSensorEntityDescription(
+        key="requestRetries",
+        name="Request retries",
+        icon="mdi:refresh",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda api, coordinator: api.diagnostics()["client"]["retries"]
+    ),
+    EconetDebugSensorEntityDescription(
+        key="requestTimeouts",
+        name="Request timeouts",
+        icon="mdi:timer-alert-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda api, coordinator: api.diagnostics()["client"]["timeouts"]
+    ),
+    EconetDebugSensorEntityDescription(
+        key="cacheHitRatio",
+        name="Cache hit ratio",
+        icon="mdi:database-check",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda api, coordinator: _percent(api.diagnostics()["cache"]["hit_ratio"])
+    ),
+    EconetDebugSensorEntityDescription(
+        key="entityWrites",
+        name="Entity writes per refresh",
+        icon="mdi:pencil",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda api, coordinator: _round(api.metrics().mean_count(METRICS_ENTITY_WRITES))
+    ),
+    EconetDebugSensorEntityDescription(
+        key="dataAge",
+        name="Oldest data age",
+        icon="mdi:clock-outline",
+        native_unit_of_measurement=TIME_SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda api, coordinator: _round(coordinator.data_ages()["oldest"], 0)
+    ),
+)
+
+
 class EconetSensor(SensorEntity):
     """"""
 
+    # The rolling statistics change with every value, recording them would store a new attributes row per state
+    _unrecorded_attributes = ATTRIBUTE_NAMES
+
     def _sync_state(self, value):
         """Sync state"""
-        _LOGGER.debug("Update EconetSensor entity:" + self.entity_description.name)
+        _LOGGER.debug("Update EconetSensor entity: %s", self.entity_description.name)
 
-        self._attr_native_value = self.entity_description.process_val(value)
+        self._attr_native_value = value
+
+        if self.entity_description.track_statistics or self.entity_description.sample_filter is not None:
+            self._attr_extra_state_attributes = {
+                **self._coordinator.statistics(self.entity_description.key),
+                **self._coordinator.filter_status(self.entity_description.key)
+            }
 
         self.async_write_ha_state()
 
@@ -134,9 +288,40 @@ class ControllerSensor(EconetEntity, EconetSensor):
                  api: Econet300Api):
         super().__init__(description, coordinator, api)
 
+    async def async_added_to_hass(self):
+        """Handle added to hass."""
+        if self.entity_description.track_statistics:
+            self.async_on_remove(self._coordinator.async_track_statistics(self.entity_description.key))
+        if self.entity_description.sample_filter is not None:
+            self.async_on_remove(
+                self._coordinator.async_register_filter(self.entity_description.key,
+                                                        self.entity_description.sample_filter)
+            )
+        if self.entity_description.process_val is not identity:
+            # Values are processed by the coordinator in one batch per refresh
+            self.async_on_remove(
+                self._coordinator.async_register_processor(self.entity_description.key,
+                                                           self.entity_description.process_val)
+            )
+
+        await super().async_added_to_hass()
+
+    def _required_keys(self) -> tuple[str, ...]:
+        """Derived values need their source key to be fetched"""
+        if self.entity_description.source_key is None:
+            return super()._required_keys()
+
+        return self.entity_description.key, self.entity_description.source_key
+
+    def _value_expected(self) -> bool:
+        """Derived values are None until there is enough history of their source key"""
+        return self.entity_description.source_key is None
+
 
 def can_add(desc: EconetSensorEntityDescription, coordinator: EconetDataCoordinator):
-    return coordinator.has_data(desc.key) and coordinator.data[desc.key] is not None
+    key = desc.key if desc.source_key is None else desc.source_key
+
+    return coordinator.fetched_value(key) is not None
 
 
 def create_controller_sensors(coordinator: EconetDataCoordinator, api: Econet300Api):
@@ -146,12 +331,73 @@ def create_controller_sensors(coordinator: EconetDataCoordinator, api: Econet300
         if can_add(description, coordinator):
             entities.append(ControllerSensor(description, coordinator, api))
         else:
-            _LOGGER.debug("Availability key: " + description.key + " does not exist, entity will not be "
-                                                                   "added")
+            _LOGGER.debug("Availability key: %s does not exist, entity will not be added", description.key)
 
     return entities
 
 
+def create_discovered_sensor(coordinator: EconetDataCoordinator, api: Econet300Api, discovered: "DiscoveredKey"):
+    pattern = discovered.pattern
+
+    description = EconetSensorEntityDescription(
+        key=discovered.key,
+        name=discovered.name,
+        device=discovered.device,
+        icon=pattern.icon,
+        native_unit_of_measurement=pattern.unit,
+        state_class=SensorStateClass.MEASUREMENT,
+        device_class=pattern.device_class,
+        process_val=rounder(pattern.precision),
+        tolerance=pattern.tolerance,
+        sample_filter=pattern.sample_filter
+    )
+
+    return ControllerSensor(description, coordinator, api)
+
+
+class ControllerDebugSensor(SensorEntity):
+    """Instrumentation of the controller, metrics are collected only while a debug sensor is enabled"""
+
+    _attr_should_poll = False
+
+    def __init__(self, description: EconetDebugSensorEntityDescription, coordinator: EconetDataCoordinator,
+                 api: Econet300Api):
+        self.entity_description = description
+        self._coordinator = coordinator
+        self._api = api
+
+    @property
+    def unique_id(self) -> str | None:
+        """Return the unique_id of the entity"""
+        return f"{self._api.uid()}-debug-{self.entity_description.key}"
+
+    @property
+    def device_info(self):
+        """Return device info of the entity"""
+        return device_info(self, self._api)
+
+    @property
+    def name(self) -> str:
+        """Return the name of the entity."""
+        return self.entity_description.name
+
+    async def async_added_to_hass(self):
+        """Handle added to hass."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._api.metrics().enable())
+        self.async_on_remove(self._coordinator.async_add_listener(self._handle_coordinator_update))
+        self._handle_coordinator_update()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._attr_native_value = self.entity_description.value_fn(self._api, self._coordinator)
+        self.async_write_ha_state()
+
+
+def create_debug_sensors(coordinator: EconetDataCoordinator, api: Econet300Api):
+    return [ControllerDebugSensor(description, coordinator, api) for description in DEBUG_SENSOR_TYPES]
+
+
 async def async_setup_entry(
         hass: HomeAssistant,
         entry: ConfigEntry,
@@ -164,5 +410,15 @@ async def async_setup_entry(
 
     entities: list[EconetSensor] = []
     entities = entities + create_controller_sensors(coordinator, api)
+    entities = entities + create_debug_sensors(coordinator, api)
 
-    return async_add_entities(entities)
+    async_add_entities(entities)
+
+    hass.data[DOMAIN][entry.entry_id][SERVICE_DISCOVERY].async_add_platform(
+        Platform.SENSOR,
+        [description.key for description in SENSOR_TYPES],
+        lambda discovered: create_discovered_sensor(coordinator, api, discovered),
+        async_add_entities,
+        [(partial(can_add, description, coordinator), partial(ControllerSensor, description, coordinator, api))
+         for description in SENSOR_TYPES if not can_add(description, coordinator)]
+    )
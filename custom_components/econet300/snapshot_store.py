@@ -0,0 +1,85 @@
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, STORAGE_VERSION, STORAGE_SAVE_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+SYS_PARAMS = "sys_params"
+REG_PARAMS = "reg_params"
+
+
+class SnapshotStore:
+    """Persists the last sysParams and regParams of a controller so that setup doesn't wait for it"""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str):
+        self._store = Store(hass, STORAGE_VERSION, storage_key(entry_id))
+        self._data = {}
+        # Store re-arms its timer on every delayed save, so it is only called by the first change after a save
+        self._save_pending = False
+
+    async def async_load(self):
+        self._data = await self._store.async_load() or {}
+
+    def sys_params(self) -> dict | None:
+        return self._data.get(SYS_PARAMS)
+
+    def reg_params(self) -> dict | None:
+        return self._data.get(REG_PARAMS)
+
+    @callback
+    def async_save_sys_params(self, sys_params: dict):
+        if self._data.get(SYS_PARAMS) == sys_params:
+            return
+
+        self._data[SYS_PARAMS] = sys_params
+        self._schedule_save()
+
+    @callback
+    def async_save_reg_params(self, reg_params: dict):
+        """Replace the stored reg_params, e.g. by the snapshot of a full refresh"""
+        if self._data.get(REG_PARAMS) == reg_params:
+            return
+
+        self._data[REG_PARAMS] = dict(reg_params)
+        self._schedule_save()
+
+    @callback
+    def async_update_reg_params(self, reg_params: dict):
+        """Merge reg_params, e.g. the changed values of a refresh, into the stored ones.
+
+        The refreshes between the full ones return the fast changing keys only, merging keeps the slow ones. A
+        save is scheduled only if a value differs from the stored one.
+        """
+        stored = self._data.setdefault(REG_PARAMS, {})
+        changed = {key: value for key, value in reg_params.items() if key not in stored or stored[key] != value}
+
+        if not changed:
+            return
+
+        stored.update(changed)
+        self._schedule_save()
+
+    @callback
+    def _schedule_save(self):
+        if self._save_pending:
+            return
+
+        self._save_pending = True
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        self._save_pending = False
+
+        return self._data
+
+
+def storage_key(entry_id: str) -> str:
+    return f"{DOMAIN}.{entry_id}"
+
+
+async def async_remove_snapshot(hass: HomeAssistant, entry_id: str):
+    await Store(hass, STORAGE_VERSION, storage_key(entry_id)).async_remove()
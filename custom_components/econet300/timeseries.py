@@ -0,0 +1,134 @@
+import logging
+from array import array
+from collections import deque
+
+from .const import TIMESERIES_CAPACITY, TIMESERIES_WINDOWS
+
+_LOGGER = logging.getLogger(__name__)
+
+# State attribute names of the statistics, e.g. min_1h
+ATTRIBUTE_NAMES = frozenset(
+    "{}_{}".format(name, window) for name in ("min", "max", "mean") for window in TIMESERIES_WINDOWS
+)
+
+
+class _Window:
+    """Rolling min/max/mean over the samples of the last duration seconds, updated incrementally"""
+
+    __slots__ = ("name", "duration", "head", "sum", "count", "min_seqs", "max_seqs")
+
+    def __init__(self, name: str, duration: float):
+        self.name = name
+        self.duration = duration
+        # Sequence number of the oldest sample in the window
+        self.head = 0
+        self.sum = 0.0
+        self.count = 0
+        # Monotonic queues of sequence numbers, the first one is the current min/max
+        self.min_seqs = deque()
+        self.max_seqs = deque()
+
+    def add(self, series: "TimeSeries", seq: int, value: float):
+        self.sum += value
+        self.count += 1
+
+        while self.min_seqs and series.value(self.min_seqs[-1]) >= value:
+            self.min_seqs.pop()
+        self.min_seqs.append(seq)
+
+        while self.max_seqs and series.value(self.max_seqs[-1]) <= value:
+            self.max_seqs.pop()
+        self.max_seqs.append(seq)
+
+    def evict(self, series: "TimeSeries", until_seq: int):
+        """Drop samples with a sequence number below until_seq"""
+        while self.head < until_seq and self.count:
+            self.sum -= series.value(self.head)
+            self.count -= 1
+            self.head += 1
+
+        self.head = max(self.head, until_seq)
+
+        while self.min_seqs and self.min_seqs[0] < self.head:
+            self.min_seqs.popleft()
+        while self.max_seqs and self.max_seqs[0] < self.head:
+            self.max_seqs.popleft()
+
+    def stats(self, series: "TimeSeries") -> dict | None:
+        if not self.count:
+            return None
+
+        return {
+            "min": series.value(self.min_seqs[0]),
+            "max": series.value(self.max_seqs[0]),
+            "mean": self.sum / self.count
+        }
+
+
+class TimeSeries:
+    """Fixed size ring buffer of (timestamp, float32 value) samples with rolling statistics over several windows.
+
+    Memory is bounded by the capacity, windows longer than the span of the buffer only cover the buffered samples.
+    """
+
+    __slots__ = ("_capacity", "_times", "_values", "_next", "_windows")
+
+    def __init__(self, capacity: int = TIMESERIES_CAPACITY, windows: dict[str, float] = TIMESERIES_WINDOWS):
+        self._capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("f", bytes(4 * capacity))
+        # Sequence number of the next sample, slot = seq % capacity
+        self._next = 0
+        self._windows = tuple(_Window(name, duration) for name, duration in windows.items())
+
+    def __len__(self):
+        return min(self._next, self._capacity)
+
+    def value(self, seq: int) -> float:
+        return self._values[seq % self._capacity]
+
+    def time(self, seq: int) -> float:
+        return self._times[seq % self._capacity]
+
+    def append(self, timestamp: float, value: float):
+        seq = self._next
+        slot = seq % self._capacity
+
+        # The sample about to be overwritten has to leave the windows while its value is still readable
+        if seq >= self._capacity:
+            for window in self._windows:
+                window.evict(self, seq - self._capacity + 1)
+
+        self._times[slot] = timestamp
+        self._values[slot] = value
+        self._next += 1
+
+        # Add the float32 value, so that the statistics match what is evicted later
+        value = self._values[slot]
+
+        for window in self._windows:
+            window.add(self, seq, value)
+
+            cutoff = timestamp - window.duration
+            until = window.head
+            while until < seq and self.time(until) <= cutoff:
+                until += 1
+            window.evict(self, until)
+
+    def stats(self) -> dict[str, dict | None]:
+        return {window.name: window.stats(self) for window in self._windows}
+
+    def attributes(self, precision: int = 2) -> dict:
+        """Statistics as flat state attributes, e.g. min_1h, max_1h, mean_1h"""
+        attributes = {}
+
+        for window in self._windows:
+            stats = window.stats(self)
+
+            if stats is None:
+                continue
+
+            for name, value in stats.items():
+                attributes["{}_{}".format(name, window.name)] = round(value, precision)
+
+        return attributes
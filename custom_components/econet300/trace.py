@@ -0,0 +1,248 @@
+"""Recording of the controller traffic and replay of the recorded traces without a controller.
+
+A trace is a gzip compressed JSON lines file. The first line is a header, every other line a response:
+
+    {"version": 1, "host": "http://192.168.1.10", "started": 1700000000.0}
+    {"t": 0.412, "url": "/econet/regParams", "status": 200, "body": "{...}"}
+    {"t": 30.51, "url": "/econet/regParams", "status": 200, "same": true}
+    {"t": 60.63, "url": "/econet/regParams", "error": "timeout"}
+
+t is the offset in seconds from the start of the recording session, url is relative to the host. A body identical
+to the previous body of the same url in the session is stored as "same". Every recorder appends a session to the
+file, starting with its own header line, e.g. after every HA restart.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import time
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from .api import ApiError, AuthError
+from .const import TRACE_VERSION, TRACE_FLUSH_SIZE
+from .json_decoder import decode
+from .metrics import Metrics
+
+_LOGGER = logging.getLogger(__name__)
+
+ERROR_TIMEOUT = "timeout"
+ERROR_CLIENT = "client"
+
+
+class TraceRecorder:
+    """Appends the responses of an EconetClient to a trace file.
+
+    Records are buffered and written from an executor, so recording never blocks the event loop on file I/O.
+    """
+
+    def __init__(self, path: str, host: str, clock=time.monotonic):
+        self._path = path
+        self._clock = clock
+        self._started = clock()
+        self._buffer: list[str] = [json.dumps({"version": TRACE_VERSION, "host": host, "started": time.time()})]
+        self._last_bodies: dict[str, bytes] = {}
+        self._pending_write: asyncio.Future | None = None
+        self.records = 0
+
+    def record(self, url: str, status: int, body: bytes | None = None):
+        record = {"t": round(self._clock() - self._started, 3), "url": self._relative(url), "status": status}
+
+        if body is not None:
+            if self._last_bodies.get(record["url"]) == body:
+                record["same"] = True
+            else:
+                self._last_bodies[record["url"]] = body
+                record["body"] = body.decode("utf-8", errors="replace")
+
+        self._append(record)
+
+    def record_error(self, url: str, error: BaseException):
+        self._append({
+            "t": round(self._clock() - self._started, 3),
+            "url": self._relative(url),
+            "error": ERROR_TIMEOUT if isinstance(error, asyncio.TimeoutError) else ERROR_CLIENT
+        })
+
+    async def async_flush(self):
+        # Only one write to the file runs at a time
+        while self._pending_write is not None and not self._pending_write.done():
+            await self._pending_write
+
+        if self._buffer:
+            self._start_write()
+
+        if self._pending_write is not None:
+            await self._pending_write
+
+    def _append(self, record: dict):
+        self._buffer.append(json.dumps(record, separators=(",", ":")))
+        self.records += 1
+
+        if len(self._buffer) >= TRACE_FLUSH_SIZE and (self._pending_write is None or self._pending_write.done()):
+            self._start_write()
+
+    def _start_write(self):
+        lines, self._buffer = self._buffer, []
+        self._pending_write = asyncio.get_running_loop().run_in_executor(None, self._write, lines)
+
+    def _write(self, lines: list[str]):
+        # Every flush appends a gzip member, a sequence of members is a valid gzip file
+        with gzip.open(self._path, "at", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+    @staticmethod
+    def _relative(url: str) -> str:
+        parts = urlsplit(url)
+
+        return parts.path + ("?" + parts.query if parts.query else "")
+
+
+class Trace:
+    """Responses of a trace file grouped by url"""
+
+    def __init__(self, header: dict, records: list[dict]):
+        self.header = header
+        self.records = records
+        self.duration = records[-1]["t"] if records else 0.0
+        self.by_url: dict[str, list[dict]] = {}
+
+        for record in records:
+            self.by_url.setdefault(record["url"], []).append(record)
+
+    @classmethod
+    def load(cls, path: str) -> "Trace":
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            lines = [json.loads(line) for line in file if line.strip()]
+
+        if not lines or lines[0].get("version") != TRACE_VERSION:
+            raise ValueError("Not a version {} trace: {}".format(TRACE_VERSION, path))
+
+        header = lines[0]
+        records = []
+        offset = 0.0
+        last_bodies = {}
+
+        for line in lines:
+            if "version" in line:
+                if line["version"] != TRACE_VERSION:
+                    raise ValueError("Not a version {} trace: {}".format(TRACE_VERSION, path))
+
+                # A session appended to the file, its times are relative to its own start
+                offset = line.get("started", 0.0) - header.get("started", 0.0)
+                last_bodies = {}
+                continue
+
+            line["t"] = round(line["t"] + offset, 3)
+
+            # Resolve "same" so that every response record carries its body
+            if "body" in line:
+                last_bodies[line["url"]] = line["body"]
+            elif line.pop("same", False):
+                line["body"] = last_bodies[line["url"]]
+
+            records.append(line)
+
+        return cls(header, records)
+
+
+class ReplayClient:
+    """Stands in for EconetClient, answering its requests from a trace.
+
+    With a speed the replay follows the clock of the trace (speed 1 is real time, 60 is a minute per second) and
+    every read returns the last response recorded up to that point. Without a speed every read returns the next
+    recorded response of its url, as fast as possible. Param writes are answered with OK.
+    """
+
+    def __init__(self, trace: Trace, speed: float | None = None, loop_trace: bool = False, clock=time.monotonic):
+        self._trace = trace
+        self._speed = speed
+        self._loop_trace = loop_trace
+        self._clock = clock
+        self._started = clock()
+        self._positions: dict[str, int] = {}
+        self._metrics = Metrics()
+        self._requests = 0
+        self._writes = 0
+
+    def host(self):
+        return self._trace.header.get("host", "replay")
+
+    def metrics(self) -> Metrics:
+        return self._metrics
+
+    async def async_close(self):
+        pass
+
+    def diagnostics(self) -> dict:
+        return {
+            "replay": True,
+            "requests": self._requests,
+            "writes": self._writes,
+            "elapsed": self._elapsed()
+        }
+
+    async def set_param(self, key: str, value: str):
+        self._writes += 1
+
+        return {"result": "OK"}
+
+    async def get_params(self, reg: str, sections: tuple[str, ...] | None = None):
+        self._requests += 1
+        records = self._trace.by_url.get("/econet/{}".format(reg))
+
+        if not records:
+            raise ApiError("No recorded responses for: {}".format(reg))
+
+        record = await self._next_record(reg, records)
+
+        if "error" in record:
+            raise ApiError("Recorded {} error for: {}".format(record["error"], reg))
+
+        if record["status"] == HTTPStatus.UNAUTHORIZED:
+            raise AuthError
+
+        if record["status"] != HTTPStatus.OK:
+            return None
+
+        return decode(record["body"].encode("utf-8"), sections)
+
+    async def _next_record(self, reg: str, records: list[dict]) -> dict:
+        if self._speed is None:
+            position = self._positions.get(reg, 0)
+
+            if position >= len(records):
+                if not self._loop_trace:
+                    raise ApiError("Trace exhausted for: {}".format(reg))
+                position = 0
+
+            self._positions[reg] = position + 1
+
+            return records[position]
+
+        elapsed = self._elapsed()
+
+        if elapsed > self._trace.duration and self._loop_trace and self._trace.duration:
+            elapsed %= self._trace.duration
+
+        # Wait for the first response if the replay is ahead of it
+        if elapsed < records[0]["t"]:
+            await asyncio.sleep((records[0]["t"] - elapsed) / self._speed)
+            return records[0]
+
+        position = self._positions.get(reg, 0)
+
+        if position > 0 and records[position - 1]["t"] > elapsed:
+            position = 0
+
+        while position + 1 < len(records) and records[position + 1]["t"] <= elapsed:
+            position += 1
+
+        self._positions[reg] = position
+
+        return records[position]
+
+    def _elapsed(self) -> float:
+        elapsed = self._clock() - self._started
+
+        return elapsed * self._speed if self._speed is not None else elapsed
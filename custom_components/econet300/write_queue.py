@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from .const import API_WRITE_MIN_SPACING
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WriteQueue:
+    """Serializes param writes to a single controller.
+
+    Repeated writes to a param that is still queued are merged (last writer wins), all of their futures
+    resolve with the result of the write that was actually sent.
+    """
+
+    def __init__(self, writer: Callable[[str, Any], Awaitable[bool]], min_spacing: float = API_WRITE_MIN_SPACING):
+        self._writer = writer
+        self._min_spacing = min_spacing
+        self._pending: dict[str, tuple[Any, list[asyncio.Future]]] = {}
+        self._worker: asyncio.Task | None = None
+        self._in_progress: list[asyncio.Future] = []
+        self._last_write = None
+        self._listeners: list[Callable[[dict], None]] = []
+        self.written = 0
+        self.failed = 0
+        self.merged = 0
+
+    def add_listener(self, listener: Callable[[dict], None]) -> Callable[[], None]:
+        """Register a callback receiving {param: value} of the successful writes of every batch"""
+        self._listeners.append(listener)
+
+        return lambda: self._listeners.remove(listener)
+
+    def submit(self, param: str, value) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+
+        if param in self._pending:
+            _LOGGER.debug("Merging queued write for: '%s'", param)
+            self.merged += 1
+            futures = self._pending.pop(param)[1]
+        else:
+            futures = []
+
+        futures.append(future)
+        self._pending[param] = (value, futures)
+
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run())
+
+        return future
+
+    def diagnostics(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "written": self.written,
+            "failed": self.failed,
+            "merged": self.merged
+        }
+
+    async def async_close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+
+        _resolve(self._in_progress, False)
+        for _, futures in self._pending.values():
+            _resolve(futures, False)
+
+        self._pending.clear()
+
+    async def _run(self):
+        while self._pending:
+            written = {}
+
+            while self._pending:
+                param = next(iter(self._pending))
+                value, self._in_progress = self._pending.pop(param)
+
+                ok = await self._write(param, value)
+                _resolve(self._in_progress, ok)
+                self._in_progress = []
+
+                if ok:
+                    written[param] = value
+
+            if written:
+                for listener in self._listeners:
+                    listener(written)
+
+    async def _write(self, param: str, value) -> bool:
+        if self._last_write is not None:
+            wait = self._last_write + self._min_spacing - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+        try:
+            ok = await self._writer(param, value)
+        except Exception as error:  # pylint: disable=broad-except
+            _LOGGER.warning("Writing param: '%s' failed: %r", param, error)
+            ok = False
+        finally:
+            self._last_write = time.monotonic()
+
+        if ok:
+            self.written += 1
+        else:
+            self.failed += 1
+
+        return ok
+
+
+def _resolve(futures: list[asyncio.Future], result: bool):
+    for future in futures:
+        if not future.done():
+            future.set_result(result)